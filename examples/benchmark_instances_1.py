@@ -22,7 +22,7 @@ def main():
 
     log = open('./data/log_1.csv', 'w')
     log.write(
-        'inst_name,model_name,nvar,ncon,nnz,dt_model,dt_solve,dt_relax,solved,val,val_relax,servers,fireups\n'
+        'inst_name,model_name,nvar,ncon,nnz,dt_model,dt_solve,dt_relax,solved,val,val_relax,servers,fireups,root_lp\n'
     )
 
     for n, t, cat in groups:
@@ -66,8 +66,10 @@ maximal server count = {ub_servers}'''
                 model._set_start(alloc)
                 dt_model = time.time() - t0
 
+                # records the root relaxation during the solve
+                trace = tbpp_cf2.solve.BoundTrace()
                 t0 = time.time()
-                model.optimize()
+                tbpp_cf2.solve.optimize(model, trace=trace)
                 dt_solve = time.time() - t0
 
                 if model.Status == gp.GRB.Status.INTERRUPTED:
@@ -77,17 +79,19 @@ maximal server count = {ub_servers}'''
                 servers = model._servers.getValue()
                 fireups = model._fireups.getValue()
 
-                model_relax = model.relax()
-                t0 = time.time()
-                model_relax.optimize()
-                if model_relax.Status == gp.GRB.Status.INTERRUPTED:
+                # the root relaxation of the presolved model, missing if
+                # the solve stopped before it
+                root_lp = '' if trace.root_lp is None else trace.root_lp
+
+                # relaxes the model itself instead of a copy
+                lp = tbpp_cf2.solve.solve_lp(model, in_place=True)
+                if lp.status == gp.GRB.Status.INTERRUPTED:
                     raise KeyboardInterrupt()
-                assert model_relax.Status == gp.GRB.Status.OPTIMAL
-                val_relax = model_relax.ObjVal
-                dt_relax = time.time() - t0
+                assert lp.status == gp.GRB.Status.OPTIMAL
+                val_relax, dt_relax = lp.value, lp.runtime
 
                 log.write(
-                    f'{inst_name},{model_name},{model.NumVars},{model.NumConstrs},{model.NumNZs},{dt_model},{dt_solve},{dt_relax},{solved},{val:.0f},{val_relax},{servers:.0f},{fireups:.0f}\n'
+                    f'{inst_name},{model_name},{model.NumVars},{model.NumConstrs},{model.NumNZs},{dt_model},{dt_solve},{dt_relax},{solved},{val:.0f},{val_relax},{servers:.0f},{fireups:.0f},{root_lp}\n'
                 )
                 log.flush()
 
@@ -0,0 +1,27 @@
+import tbpp_cf2
+from tbpp_cf2 import sweep
+
+
+def main():
+    # generate and lift a random instance
+    inst = tbpp_cf2.InstanceTBPP.random(20, 100, seed=0)
+    inst = tbpp_cf2.lift(inst)
+    inst = tbpp_cf2.InstanceTBPPFU.extend(inst, gamma=1.0)
+    gammas = [0.5, 1.0, 2.0, 5.0]
+
+    # apply heuristic
+    alloc = tbpp_cf2.heuristic.best_look_ahead(inst, {1, 2, 3, 4, 5, 10})
+
+    # build the model once and solve it for all weights
+    model = sweep.build_for_gammas(tbpp_cf2.model1.build, inst, gammas, alloc)
+    model.setParam('OutputFlag', 0)
+    for p in sweep.gamma_sweep(model, gammas, alloc):
+        print(f'gamma = {p.gamma}: z* = {p.value:.1f}, servers = {p.servers}, fireups = {p.fireups}')
+
+    # trade-off between servers and fire-ups
+    for p in sweep.pareto_front(model):
+        print(f'servers = {p.servers}, fireups = {p.fireups}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,25 @@
+from importlib import import_module
+from . import instance
 from .instance import *
-from . import heuristic
-from . import model1
-from . import model2
-from . import model3
-from . import data
-from .lifting import *
+
+# submodules are imported on first access, such that the heuristic and the
+# data loaders can be used without importing gurobipy
+_SUBMODULES = {'heuristic', 'model1', 'model2', 'model3', 'data', 'lifting', 'solve'}
+_ATTRIBUTES = {'lift': 'lifting'}
+
+# as before the lazy imports, `import *` gives the submodules and `lift`
+__all__ = instance.__all__ + ['instance'] + sorted(_SUBMODULES) + sorted(_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return import_module(f'.{name}', __name__)
+    if name in _ATTRIBUTES:
+        value = getattr(import_module(f'.{_ATTRIBUTES[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES | set(_ATTRIBUTES))
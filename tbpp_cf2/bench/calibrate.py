@@ -0,0 +1,62 @@
+import argparse
+import json
+from typing import Optional
+import gurobipy as gp
+from .. import lift
+from ..memo import ResultCache
+from ..selection import calibrate
+from .runner import AUTO, Config, read_instance
+
+__all__ = ['read_records', 'main']
+
+
+def read_records(path: str) -> list[dict]:
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            # runs that failed to build have no sizes, LP runs no solve time
+            if rec.get('nnz', None) is not None and not rec.get('lp_only', False):
+                records.append(rec)
+    return records
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tbpp_cf2.bench.calibrate',
+        description='Fit the model selector to a log of the benchmark runner.',
+    )
+    parser.add_argument('--root', default='./data/TestInstances')
+    parser.add_argument('--log', nargs='+', default=['./data/log_1.jsonl'])
+    parser.add_argument('--cache', nargs='?', const='', default=None,
+                        help='read the instances from a binary store')
+    parser.add_argument('--results', default=None,
+                        help='directory of the result cache of the runner, to reuse the lifted instances')
+    parser.add_argument('--ridge', type=float, default=1e-2)
+    parser.add_argument('--penalty', type=float, default=2.0,
+                        help='factor of the solve time of runs that hit the time limit')
+    parser.add_argument('--min-samples', type=int, default=5)
+    parser.add_argument('--output', '-o', default='./data/selector.json')
+    args = parser.parse_args(argv)
+
+    gp.setParam('OutputFlag', 0)
+    cfg = Config(root=args.root, log='', cache=args.cache, results=args.results)
+    memo = ResultCache(cfg.results, cfg.results_max_bytes) if cfg.results else None
+
+    def load(group_name: str, inst_name: str):
+        inst = read_instance(cfg, group_name, inst_name)
+        return (lift(inst) if memo is None else memo.lift(inst)).sorted()
+
+    records = [rec for path in args.log for rec in read_records(path)]
+    selector = calibrate(records, load, args.ridge, args.penalty, args.min_samples)
+    selector.save(args.output)
+    for key in sorted(selector.samples):
+        print(f'{key:40s} samples={selector.samples[key]:5d} rmse(log s)={selector.rmse[key]:.3f}')
+    print(f'{len(records)} records ({sum(rec["model_name"] == AUTO for rec in records)} selected runs), saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
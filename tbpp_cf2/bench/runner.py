@@ -0,0 +1,555 @@
+import argparse
+import dataclasses
+import glob
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from typing import Optional
+import gurobipy as gp
+from .. import InstanceTBPP, InstanceTBPPFU, heuristic, ir, lift, model1, model2, model3
+from ..bounds import compute_bounds
+from ..colgen import column_generation
+from ..data import format1
+from ..data.cache import Store
+from ..memo import ResultCache, instance_hash
+from ..selection import Selector, default_mods
+from ..solve import LP_METHODS, BoundTrace, apply_params, load_profile, optimize, solve_lp
+from ..stats import BuildStats
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__all__ = [
+    'Config', 'read_bounds', 'list_tasks', 'run_settings', 'read_done', 'read_instance',
+    'Prepared', 'prepare_instance', 'solve_model', 'run_instance', 'run', 'main',
+]
+
+MODELS = dict(
+    model1=model1.build,
+    model2=model2.build,
+    model3=model3.build,
+)
+# models supporting the 'aggregate' mod
+AGGREGATE_MODELS = {'model1', 'model2'}
+# runs the model and mods chosen by the selector of Config.select
+AUTO = 'auto'
+
+
+@dataclasses.dataclass
+class Config:
+    root: str
+    log: str
+    models: tuple[str, ...] = tuple(MODELS)
+    gamma: float = 1.0
+    time_limit: float = 1800
+    threads: int = 1
+    lb_servers: dict[str, int] = dataclasses.field(default_factory=dict)
+    stats: bool = False
+    # path of a binary store of the instances, '' for the default path
+    cache: Optional[str] = None
+    # directory of a cache of lifting, heuristic and solve results
+    results: Optional[str] = None
+    results_max_bytes: int = 1 << 30
+    # time limit of the column generation bound, 0 to skip it
+    colgen_time: float = 0.0
+    # aggregate identical jobs in model1 and model2
+    aggregate: bool = False
+    # 'gurobi' or 'highs', see tbpp_cf2.ir.BACKENDS
+    backend: str = 'gurobi'
+    # directory of the checkpoints of unfinished solves
+    checkpoint: Optional[str] = None
+    # calibrated tbpp_cf2.selection.Selector for the model AUTO
+    select: Optional[str] = None
+    # parameters per group and model, see tbpp_cf2.solve.load_profile
+    profile: Optional[str] = None
+    # branch priority of the server variables
+    priority: int = 0
+    # variable hints from the 'heuristic' allocation or the 'lp' relaxation
+    hints: Optional[str] = None
+    # solve the LP relaxation after the MIP solve for val_relax
+    relax: bool = True
+    # solve the LP relaxation only, for studies of the bound
+    lp_only: bool = False
+    # see tbpp_cf2.solve.LP_METHODS
+    lp_method: str = 'barrier'
+    crossover: bool = False
+
+
+def read_bounds(path: str) -> dict[str, int]:
+    res = {}
+    with open(path) as f:
+        for line in f.readlines()[1:]:
+            inst_name, value = line.split(',')
+            res[inst_name] = int(value)
+    return res
+
+
+def list_tasks(root: str, shard: int = 0, num_shards: int = 1, by: str = 'instance'):
+    assert by in {'instance', 'group'}
+    assert 0 <= shard < num_shards
+    tasks = []
+    idx = 0
+    for group_idx, (n, t, cat) in enumerate(format1.get_groups(root)):
+        group_name = f'n{n} t{t} {cat}'
+        paths = sorted(glob.glob(os.path.join(root, group_name, '*.txt')))
+        for inst_path in paths:
+            key = group_idx if by == 'group' else idx
+            if key % num_shards == shard:
+                tasks.append((group_name, os.path.basename(inst_path)))
+            idx += 1
+    return tasks
+
+
+# settings of Config that are logged in every record, with the values of
+# records that do not contain them; a pair is only skipped if it was
+# logged with the same settings
+RUN_SETTINGS = dict(priority=0, hints=None)
+
+
+def run_settings(cfg: Config) -> dict:
+    return {name: getattr(cfg, name) for name in RUN_SETTINGS}
+
+
+def read_done(path: str, settings: Optional[dict] = None) -> set[tuple[str, str]]:
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                # a crash may leave a truncated last line
+                continue
+            if 'error' in rec:
+                # failed pairs are retried
+                continue
+            if settings is not None and any(
+                rec.get(name, default) != settings[name] for name, default in RUN_SETTINGS.items()
+            ):
+                continue
+            done.add((rec['inst_name'], rec['model_name']))
+    return done
+
+
+def append_record(path: str, rec: dict):
+    line = (json.dumps(rec) + '\n').encode()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def _init_worker(threads: int):
+    # applies to every model created in this process, including the
+    # knapsack models used for lifting
+    gp.setParam('OutputFlag', 0)
+    gp.setParam('Threads', threads)
+
+
+def model_mods(cfg: Config, model_name: str) -> frozenset[str]:
+    mods = default_mods(model_name)
+    if cfg.aggregate and model_name in AGGREGATE_MODELS:
+        mods |= {'aggregate'}
+    return mods
+
+
+def checkpoint_key(
+    cfg: Config, model_name: str, mods: frozenset[str],
+    inst: InstanceTBPPFU, lb_servers: int, ub_servers: int,
+) -> str:
+    data = dict(
+        inst=instance_hash(inst),
+        model_name=model_name,
+        mods=sorted(mods),
+        lb_servers=lb_servers,
+        ub_servers=ub_servers,
+        backend=cfg.backend,
+    )
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def solve_model(
+    cfg: Config, model_name: str, mods: frozenset[str], inst: InstanceTBPPFU, alloc,
+    lb_servers: int, ub_servers: int, lb_value: float,
+    checkpoint: Optional[str] = None,
+    params: Optional[dict] = None,
+) -> dict:
+    t0 = time.time()
+    model = MODELS[model_name](
+        inst,
+        lb_servers=lb_servers,
+        ub_servers=ub_servers,
+        mods=set(mods),
+        stats=BuildStats() if cfg.stats else None,
+        backend=cfg.backend,
+        priority=cfg.priority,
+        hints=alloc if cfg.hints == 'heuristic' else cfg.hints,
+    )
+    if cfg.backend != 'gurobi':
+        # the global Gurobi parameters of the worker do not apply
+        model.setParam('OutputFlag', 0)
+    apply_params(model, params or {})
+    if cfg.lp_only:
+        dt_model = time.time() - t0
+        lp = solve_lp(model, cfg.lp_method, cfg.crossover, cfg.time_limit, in_place=True)
+        if lp.status == gp.GRB.Status.INTERRUPTED:
+            raise KeyboardInterrupt()
+        res = dict(
+            lp_only=True,
+            mods=sorted(mods),
+            params=params or {},
+            nvar=model.NumVars,
+            ncon=model.NumConstrs,
+            nnz=model.NumNZs,
+            dt_model=dt_model,
+            dt_relax=lp.runtime,
+            val_relax=lp.value,
+            lp_method=cfg.lp_method,
+            crossover=cfg.crossover,
+        )
+        if cfg.stats:
+            res['stats'] = model._stats.as_dict()
+        return res
+    # a solution attaining the lower bound is optimal
+    model.setParam('BestObjStop', lb_value + 1e-6)
+    model.update()
+    model._set_start(alloc)
+    dt_model = time.time() - t0
+
+    # resumes from the checkpoint of an interrupted run
+    trace = BoundTrace()
+    ckpt = optimize(
+        model, checkpoint,
+        key=checkpoint_key(cfg, model_name, mods, inst, lb_servers, ub_servers),
+        time_limit=cfg.time_limit,
+        trace=trace,
+    )
+    dt_solve = ckpt.runtime
+
+    if model.Status == gp.GRB.Status.INTERRUPTED:
+        raise KeyboardInterrupt()
+    solved = model.Status in {gp.GRB.Status.OPTIMAL, gp.GRB.Status.USER_OBJ_LIMIT}
+    # the best solution of all runs, this run may have had no time left
+    has_sol = len(ckpt.alloc) > 0
+
+    res = dict(
+        mods=sorted(mods),
+        params=params or {},
+        nvar=model.NumVars,
+        ncon=model.NumConstrs,
+        nnz=model.NumNZs,
+        dt_model=dt_model,
+        dt_solve=dt_solve,
+        dt_relax=None,
+        solved=solved,
+        val=ckpt.value if has_sol else None,
+        bound=ckpt.bound,
+        val_relax=None,
+        # the root relaxation is missing if the solve stopped before it,
+        # e.g. because the MIP start attains the lower bound
+        root_lp=trace.root_lp,
+        dt_root=trace.root_time,
+        root_bound=trace.root_bound,
+        bound_trace=trace.trajectory,
+        nodes=model.NodeCount,
+        servers=ckpt.servers if has_sol else None,
+        fireups=ckpt.fireups if has_sol else None,
+        alloc=ckpt.alloc if has_sol else None,
+    )
+    if cfg.stats:
+        res['stats'] = model._stats.as_dict()
+
+    if cfg.relax:
+        # in place, since the solution of the MIP is no longer needed; the
+        # value is None if the LP is not solved within its own time limit
+        lp = solve_lp(model, cfg.lp_method, cfg.crossover, cfg.time_limit, in_place=True)
+        if lp.status == gp.GRB.Status.INTERRUPTED:
+            raise KeyboardInterrupt()
+        res.update(val_relax=lp.value, dt_relax=lp.runtime)
+    return res
+
+
+def read_instance(cfg: Config, group_name: str, inst_name: str) -> InstanceTBPP:
+    if cfg.cache is not None:
+        return Store(cfg.root, cfg.cache or None).get(group_name, inst_name)
+    return format1.read_file(os.path.join(cfg.root, group_name, inst_name))
+
+
+@dataclasses.dataclass
+class Prepared:
+    inst: InstanceTBPPFU
+    # heuristic allocation, the MIP start
+    alloc: list[frozenset[int]]
+    lb_servers: int
+    ub_servers: int
+    lb_value: float
+    # fields of the log records
+    info: dict
+
+
+def prepare_instance(
+    cfg: Config, group_name: str, inst_name: str,
+    memo: Optional[ResultCache] = None,
+) -> Prepared:
+    inst = read_instance(cfg, group_name, inst_name)
+
+    # lift instance
+    t0 = time.time()
+    inst = (lift(inst) if memo is None else memo.lift(inst)).sorted()
+    inst = InstanceTBPPFU.extend(inst, gamma=cfg.gamma)
+    dt_lift = time.time() - t0
+
+    # apply heuristic
+    t0 = time.time()
+    futures = {1, 2, 3, 5, 10, 20, inst.n // 4, inst.n // 2, inst.n}
+    if memo is None:
+        alloc = heuristic.best_look_ahead(inst, futures)
+    else:
+        alloc = memo.best_look_ahead(inst, futures)
+    vheu = inst.compute_value(alloc)
+    dt_heu = time.time() - t0
+    ub_servers = int(math.ceil(round(vheu) / (1.0 + inst.gamma) - 1e-8))
+
+    # combinatorial lower bounds
+    t0 = time.time()
+    bounds = compute_bounds(inst)
+    dt_bounds = time.time() - t0
+    lb_servers = max(cfg.lb_servers.get(inst_name, 0), bounds.servers)
+    lb_value = bounds.value
+    lb_colgen = None
+    if cfg.colgen_time > 0:
+        t0 = time.time()
+        lb_colgen = column_generation(
+            inst, columns=alloc, ub=vheu, time_limit=cfg.colgen_time
+        ).lb
+        if float(inst.gamma).is_integer():
+            lb_value = max(lb_value, float(math.ceil(lb_colgen - 1e-6)))
+        else:
+            lb_value = max(lb_value, lb_colgen)
+        dt_bounds += time.time() - t0
+
+    info = dict(
+        lb_servers=lb_servers,
+        ub_servers=ub_servers,
+        val_heu=vheu,
+        lb_fireups=bounds.fireups,
+        lb_value=lb_value,
+        lb_colgen=lb_colgen,
+        dt_lift=dt_lift,
+        dt_heu=dt_heu,
+        dt_bounds=dt_bounds,
+    )
+    return Prepared(inst, alloc, lb_servers, ub_servers, lb_value, info)
+
+
+def run_instance(cfg: Config, group_name: str, inst_name: str, models: list[str]):
+    memo = ResultCache(cfg.results, cfg.results_max_bytes) if cfg.results else None
+    prep = prepare_instance(cfg, group_name, inst_name, memo)
+    inst, alloc = prep.inst, prep.alloc
+    lb_servers, ub_servers, lb_value = prep.lb_servers, prep.ub_servers, prep.lb_value
+    profile = {} if cfg.profile is None else load_profile(cfg.profile)
+
+    for model_name in models:
+        rec = dict(
+            group=group_name,
+            inst_name=inst_name,
+            model_name=model_name,
+            **run_settings(cfg),
+            **prep.info,
+        )
+        checkpoint = None
+        if cfg.checkpoint is not None:
+            checkpoint = os.path.join(cfg.checkpoint, group_name, f'{inst_name}.{model_name}.json')
+        try:
+            build_name = model_name
+            if model_name == AUTO:
+                build_name, mods = Selector.load(cfg.select).select(inst, lb_servers, ub_servers)
+            else:
+                mods = model_mods(cfg, model_name)
+            params = profile.get(group_name, {}).get(build_name, {})
+
+            def solve():
+                return solve_model(cfg, build_name, mods, inst, alloc, lb_servers, ub_servers, lb_value, checkpoint, params)
+
+            if memo is None:
+                res = solve()
+            else:
+                key = dict(
+                    lb_servers=lb_servers,
+                    ub_servers=ub_servers,
+                    # the column generation bound depends on the time it got,
+                    # so its value would rarely match again; it only decides
+                    # when a solve stops early
+                    lb_value=lb_value if cfg.colgen_time <= 0 else None,
+                    colgen_time=cfg.colgen_time,
+                    time_limit=cfg.time_limit,
+                    stats=cfg.stats,
+                    mods=sorted(mods),
+                    backend=cfg.backend,
+                    params=params,
+                    priority=cfg.priority,
+                    hints=cfg.hints,
+                    relax=cfg.relax,
+                    lp_only=cfg.lp_only,
+                    lp_method=cfg.lp_method,
+                    crossover=cfg.crossover,
+                    gurobi=gp.gurobi.version(),
+                )
+                res = memo.solve(build_name, inst, key, solve, code=(sys.modules[__name__],))
+        except Exception:
+            # logged such that the other pairs go on; the checkpoint is
+            # kept and a restart retries the pair
+            append_record(cfg.log, dict(rec, error=traceback.format_exc()))
+            continue
+
+        if model_name == AUTO:
+            rec['selected'] = build_name
+        rec.update(res)
+        append_record(cfg.log, rec)
+        if checkpoint is not None and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+    return group_name, inst_name
+
+
+def _run_task(args):
+    cfg, group_name, inst_name, models = args
+    try:
+        return run_instance(cfg, group_name, inst_name, models)
+    except Exception:
+        # e.g. an unreadable instance, the models are logged as failed
+        error = traceback.format_exc()
+        for model_name in models:
+            append_record(cfg.log, dict(
+                group=group_name,
+                inst_name=inst_name,
+                model_name=model_name,
+                **run_settings(cfg),
+                error=error,
+            ))
+        return group_name, inst_name
+
+
+def run(cfg: Config, tasks: list[tuple[str, str]], processes: Optional[int] = None):
+    # skip (instance, model) pairs that are already in the log
+    done = read_done(cfg.log, run_settings(cfg))
+    pending = []
+    for group_name, inst_name in tasks:
+        models = [
+            model_name for model_name in cfg.models
+            if (inst_name, model_name) not in done
+        ]
+        if len(models) > 0:
+            pending.append((cfg, group_name, inst_name, models))
+    print(f'{len(pending)} of {len(tasks)} instances pending')
+
+    if cfg.cache is not None:
+        # convert once here instead of concurrently in the workers
+        Store(cfg.root, cfg.cache or None).build()
+
+    if processes is None:
+        processes = max(1, (os.cpu_count() or 1) // cfg.threads)
+    # spawn fresh workers such that no Gurobi state is shared via fork
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes, initializer=_init_worker, initargs=(cfg.threads,)) as pool:
+        for idx, (group_name, inst_name) in enumerate(pool.imap_unordered(_run_task, pending)):
+            print(f'[{idx + 1}/{len(pending)}] {group_name} {inst_name}')
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    shard, num_shards = value.split('/')
+    return int(shard), int(num_shards)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tbpp_cf2.bench',
+        description='Run the compact models on a directory of benchmark instances (format 1).',
+    )
+    parser.add_argument('--root', default='./data/TestInstances')
+    parser.add_argument('--log', default='./data/log_1.jsonl')
+    parser.add_argument('--bounds', default=None,
+                        help='csv file with lower bounds on the server count')
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS) + [AUTO],
+                        help=f'{AUTO!r} runs the model chosen by the selector of --select')
+    parser.add_argument('--gamma', type=float, default=1.0)
+    parser.add_argument('--time-limit', type=float, default=1800)
+    parser.add_argument('--threads', type=int, default=1,
+                        help='Gurobi threads per worker')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--shard', type=parse_shard, default=(0, 1),
+                        help='run only shard i of n, given as i/n')
+    parser.add_argument('--cache', nargs='?', const='', default=None,
+                        help='read the instances from a binary store (created if necessary)')
+    parser.add_argument('--results', default=None,
+                        help='directory of a persistent cache of lifting, heuristic and solve results')
+    parser.add_argument('--results-max-mb', type=int, default=1024)
+    parser.add_argument('--colgen-time', type=float, default=0.0,
+                        help='time limit of the column generation bound (0 to skip it)')
+    parser.add_argument('--stats', action='store_true',
+                        help='log timing and size of the build phases')
+    parser.add_argument('--shard-by', choices=['instance', 'group'], default='instance')
+    parser.add_argument('--aggregate', action='store_true',
+                        help='one integer variable per group of identical jobs (model1, model2)')
+    parser.add_argument('--backend', choices=list(ir.BACKENDS), default='gurobi',
+                        help='solver of the models (lifting and column generation use Gurobi)')
+    parser.add_argument('--checkpoint', default=None, metavar='DIR',
+                        help='save incumbents and bounds of running solves to resume them after a restart')
+    parser.add_argument('--profile', default=None, metavar='JSON',
+                        help='Gurobi parameters per group and model, e.g. from tbpp_cf2.bench.tuning')
+    parser.add_argument('--priority', type=int, default=0,
+                        help='branch priority of the server variables')
+    parser.add_argument('--hints', choices=['heuristic', 'lp'], default=None,
+                        help='set variable hints from the heuristic allocation or the LP relaxation')
+    parser.add_argument('--no-relax', action='store_true',
+                        help='skip the LP relaxation after the MIP solve (val_relax), the root relaxation is logged anyway')
+    parser.add_argument('--lp-only', action='store_true',
+                        help='solve the LP relaxations only (use a separate log)')
+    parser.add_argument('--lp-method', choices=list(LP_METHODS), default='barrier',
+                        help='Gurobi method of the LP solves')
+    parser.add_argument('--crossover', action='store_true',
+                        help='run crossover after barrier in the LP solves')
+    parser.add_argument('--select', default=None, metavar='JSON',
+                        help='selector calibrated by tbpp_cf2.bench.calibrate for the model auto')
+    args = parser.parse_args(argv)
+    if AUTO in args.models and args.select is None:
+        parser.error(f'--models {AUTO} requires --select')
+
+    cfg = Config(
+        root=args.root,
+        log=args.log,
+        models=tuple(args.models),
+        gamma=args.gamma,
+        time_limit=args.time_limit,
+        threads=args.threads,
+        lb_servers=read_bounds(args.bounds) if args.bounds is not None else {},
+        stats=args.stats,
+        cache=args.cache,
+        results=args.results,
+        colgen_time=args.colgen_time,
+        results_max_bytes=args.results_max_mb << 20,
+        aggregate=args.aggregate,
+        backend=args.backend,
+        checkpoint=args.checkpoint,
+        select=args.select,
+        profile=args.profile,
+        priority=args.priority,
+        hints=args.hints,
+        relax=not args.no_relax,
+        lp_only=args.lp_only,
+        lp_method=args.lp_method,
+        crossover=args.crossover,
+    )
+    shard, num_shards = args.shard
+    tasks = list_tasks(args.root, shard, num_shards, args.shard_by)
+    run(cfg, tasks, args.processes)
@@ -0,0 +1,212 @@
+import argparse
+import dataclasses
+import json
+import math
+import sys
+import time
+import tracemalloc
+from typing import Optional
+import numpy as np
+import gurobipy as gp
+from .. import InstanceTBPP, InstanceTBPPFU, heuristic, lift, model1, model2, model3
+from ..util import compute_conflict_cliques
+
+__all__ = ['STAGES', 'Family', 'run_suite', 'compare', 'main']
+
+STAGES = ['lift', 'heuristic', 'cliques', 'model1', 'model2', 'model3']
+SIZES = [50, 100, 200, 500, 1000, 2000, 5000]
+
+BUILDERS = dict(
+    model1=model1.build,
+    model2=model2.build,
+    model3=model3.build,
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Family:
+    cap: int
+    # expected number of jobs that are active at the same time
+    overlap: float
+    max_dt: int = 10
+
+    @property
+    def key(self) -> str:
+        return f'cap{self.cap}_ov{self.overlap:g}'
+
+    def instance(self, n: int, seed: int) -> InstanceTBPPFU:
+        # the mean duration is (1 + max_dt) / 2, so choosing the horizon
+        # this way keeps the mean overlap independent of n
+        max_s = max(1, round(n * (1 + self.max_dt) / 2 / self.overlap))
+        inst = InstanceTBPP.random(n, self.cap, max_s=max_s, max_dt=self.max_dt, seed=seed)
+        return InstanceTBPPFU.extend(inst, gamma=1.0)
+
+
+def run_stage(stage: str, inst: InstanceTBPPFU, ub_servers: int) -> dict:
+    if stage == 'lift':
+        lift(inst)
+    elif stage == 'heuristic':
+        heuristic.best_look_ahead(inst, {1, 2, 5})
+    elif stage == 'cliques':
+        ccs = compute_conflict_cliques(inst, ub_servers)
+        return dict(ncliques=sum(len(cs) for cs_k in ccs for cs in cs_k.values()))
+    else:
+        model = BUILDERS[stage](inst, ub_servers=ub_servers)
+        model.update()
+        res = dict(nvar=model.NumVars, ncon=model.NumConstrs, nnz=model.NumNZs)
+        model.dispose()
+        return res
+    return {}
+
+
+def measure(stage: str, inst: InstanceTBPPFU, ub_servers: int, memory: bool = True) -> dict:
+    # repeat short runs and keep the fastest one to reduce noise
+    times = []
+    while len(times) < 5 and sum(times) < 0.5:
+        t0 = time.perf_counter()
+        res = run_stage(stage, inst, ub_servers)
+        times.append(time.perf_counter() - t0)
+    res['time'] = min(times)
+    if memory:
+        # separate run, since tracing distorts the timing
+        tracemalloc.start()
+        try:
+            run_stage(stage, inst, ub_servers)
+            res['peak_mem'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return res
+
+
+def fit_exponent(ns: list[int], values: list[float]) -> Optional[float]:
+    pts = [(n, v) for n, v in zip(ns, values) if v > 0]
+    if len(pts) < 2:
+        return None
+    x, y = np.log(np.array(pts, dtype=float)).T
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def run_suite(
+    sizes: list[int], families: list[Family], stages: list[str],
+    seed: int = 0, budget: float = 60.0, memory: bool = True,
+) -> dict:
+    records = []
+    fits = {}
+    for fam in families:
+        active = set(stages)
+        series = {stage: [] for stage in stages}
+        for n in sorted(sizes):
+            if len(active) == 0:
+                break
+            inst = fam.instance(n, seed + n).sorted()
+            alloc = heuristic.look_ahead(inst, 0)
+            ub_servers = int(math.ceil(
+                inst.compute_value(alloc) / (1.0 + inst.gamma) - 1e-8
+            ))
+            for stage in stages:
+                if stage not in active:
+                    continue
+                rec = dict(stage=stage, family=fam.key, n=n, ub_servers=ub_servers)
+                rec.update(measure(stage, inst, ub_servers, memory))
+                records.append(rec)
+                series[stage].append(rec)
+                print(json.dumps(rec), flush=True)
+                # larger sizes would take even longer
+                if rec['time'] > budget:
+                    active.remove(stage)
+        for stage, recs in series.items():
+            ns = [rec['n'] for rec in recs]
+            fits[f'{stage}|{fam.key}'] = {
+                key: fit_exponent(ns, [rec[key] for rec in recs])
+                for key in ['time', 'peak_mem', 'nnz']
+                if len(recs) > 0 and key in recs[0]
+            }
+    return dict(records=records, fits=fits)
+
+
+def compare(result: dict, baseline: dict, tol_exp: float = 0.3, tol_ratio: float = 2.0) -> list[str]:
+    issues = []
+    for key, fit in result['fits'].items():
+        base_fit = baseline['fits'].get(key, {})
+        for metric, exp in fit.items():
+            base_exp = base_fit.get(metric)
+            if exp is None or base_exp is None:
+                continue
+            if exp > base_exp + tol_exp:
+                issues.append(
+                    f'{key} {metric}: exponent {exp:.2f} > baseline {base_exp:.2f}'
+                )
+
+    base_records = {
+        (rec['stage'], rec['family'], rec['n']): rec
+        for rec in baseline['records']
+    }
+    for rec in result['records']:
+        base = base_records.get((rec['stage'], rec['family'], rec['n']))
+        if base is None:
+            continue
+        for metric in ['time', 'peak_mem', 'nnz']:
+            if metric not in rec or metric not in base or base[metric] <= 0:
+                continue
+            ratio = rec[metric] / base[metric]
+            # sizes are deterministic, hence any growth is reported
+            tol = 1.0 if metric == 'nnz' else tol_ratio
+            if ratio > tol:
+                issues.append(
+                    f'{rec["stage"]}|{rec["family"]} n={rec["n"]} {metric}: {ratio:.2f}x baseline'
+                )
+    return issues
+
+
+def parse_family(value: str) -> Family:
+    cap, overlap = value.split(':')
+    return Family(int(cap), float(overlap))
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tbpp_cf2.bench.scaling',
+        description='Time model building, heuristic and lifting on seeded random instances of growing size.',
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--families', type=parse_family, nargs='+',
+                        default=[Family(100, 5), Family(100, 20), Family(1000, 20)],
+                        help='families given as cap:overlap')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=60.0,
+                        help='skip larger sizes of a stage after it took longer than this (in seconds)')
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--tol-exp', type=float, default=0.3)
+    parser.add_argument('--tol-ratio', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    gp.setParam('OutputFlag', 0)
+    result = run_suite(
+        args.sizes, args.families, args.stages,
+        seed=args.seed, budget=args.budget, memory=not args.no_memory,
+    )
+    for key, fit in result['fits'].items():
+        exps = ', '.join(
+            f'{metric}~n^{exp:.2f}' for metric, exp in fit.items() if exp is not None
+        )
+        print(f'{key}: {exps}')
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=1)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        issues = compare(result, baseline, args.tol_exp, args.tol_ratio)
+        for issue in issues:
+            print(f'REGRESSION {issue}')
+        if len(issues) > 0:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import argparse
+import dataclasses
+import glob
+import json
+import math
+import multiprocessing
+import os
+import random
+from typing import Optional
+import gurobipy as gp
+from ..data import format1
+from ..memo import ResultCache
+from ..solve import SERVER_PRIORITY, apply_params
+from .runner import MODELS, Config, Prepared, _init_worker, model_mods, prepare_instance
+
+__all__ = ['SPACE', 'sample_instances', 'Evaluation', 'tune_group', 'main']
+
+# candidate values per parameter, the first one is the default
+SPACE = dict(
+    MIPFocus=[0, 1, 2, 3],
+    Cuts=[-1, 0, 1, 2],
+    Presolve=[-1, 0, 2],
+    Symmetry=[-1, 0, 2],
+    Heuristics=[0.05, 0.0, 0.2],
+    **{SERVER_PRIORITY: [0, 10]},
+)
+
+
+def sample_instances(root: str, group_name: str, count: int, seed: int = 0) -> list[str]:
+    paths = sorted(glob.glob(os.path.join(root, group_name, '*.txt')))
+    names = [os.path.basename(path) for path in paths]
+    return sorted(random.Random(seed).sample(names, min(count, len(names))))
+
+
+def _prepare(args) -> Prepared:
+    cfg, group_name, inst_name = args
+    memo = ResultCache(cfg.results, cfg.results_max_bytes) if cfg.results else None
+    return prepare_instance(cfg, group_name, inst_name, memo)
+
+
+def _solve(args) -> tuple[float, bool, float]:
+    cfg, prep, model_name, params, seed = args
+    model = MODELS[model_name](
+        prep.inst,
+        lb_servers=prep.lb_servers,
+        ub_servers=prep.ub_servers,
+        mods=set(model_mods(cfg, model_name)),
+    )
+    apply_params(model, params)
+    model.setParam('Seed', seed)
+    model.setParam('TimeLimit', cfg.time_limit)
+    model.setParam('BestObjStop', prep.lb_value + 1e-6)
+    model.update()
+    model._set_start(prep.alloc)
+    model.optimize()
+    if model.Status == gp.GRB.Status.INTERRUPTED:
+        raise KeyboardInterrupt()
+    solved = model.Status in {gp.GRB.Status.OPTIMAL, gp.GRB.Status.USER_OBJ_LIMIT}
+    return model.Runtime, solved, model.NodeCount
+
+
+@dataclasses.dataclass
+class Evaluation:
+    params: dict
+    # shifted geometric mean of the penalized run times
+    score: float
+    solved: int
+    runs: int
+    nodes: float
+
+
+def _score(times: list[float], shift: float) -> float:
+    return math.exp(sum(math.log(t + shift) for t in times) / len(times)) - shift
+
+
+def _evaluate(
+    pool, cfg: Config, preps: list[Prepared], model_name: str,
+    candidates: list[dict], seeds: list[int], penalty: float, shift: float,
+) -> list[Evaluation]:
+    # all runs of all candidates at once, such that the pool stays busy
+    tasks = [
+        (cfg, prep, model_name, params, seed)
+        for params in candidates for prep in preps for seed in seeds
+    ]
+    results = pool.map(_solve, tasks, chunksize=1)
+    per = len(preps) * len(seeds)
+    evals = []
+    for idx, params in enumerate(candidates):
+        runs = results[idx * per:(idx + 1) * per]
+        times = [t if solved else penalty * cfg.time_limit for t, solved, _ in runs]
+        evals.append(Evaluation(
+            params=params,
+            score=_score(times, shift),
+            solved=sum(solved for _, solved, _ in runs),
+            runs=len(runs),
+            nodes=sum(nodes for _, _, nodes in runs) / len(runs),
+        ))
+    return evals
+
+
+def tune_group(
+    pool, cfg: Config, preps: list[Prepared], model_name: str,
+    seeds: list[int], rounds: int = 2, min_gain: float = 0.05, min_abs: float = 0.1,
+    penalty: float = 2.0, shift: float = 1.0,
+) -> tuple[Evaluation, Evaluation]:
+    """Coordinate search over `SPACE` for one model on the sampled instances.
+
+    Every parameter in turn is set to each of its values while the others
+    keep their best values so far, and a value is kept if it lowers the
+    score by at least `min_gain` (relative) and `min_abs` seconds, which
+    keeps timing noise out of the profile. Runs that hit the time limit
+    count as `penalty` times the limit. Every configuration runs with the
+    same `seeds`, so that differences are not due to the random seed.
+    Returns the evaluations of the defaults and of the best parameters.
+    """
+    default = _evaluate(pool, cfg, preps, model_name, [{}], seeds, penalty, shift)[0]
+    best = default
+    for _ in range(rounds):
+        improved = False
+        for name, values in SPACE.items():
+            current = best.params.get(name, values[0])
+            candidates = []
+            for value in values:
+                if value == current:
+                    continue
+                params = dict(best.params)
+                params.pop(name, None)
+                if value != values[0]:
+                    params[name] = value
+                candidates.append(params)
+            evals = _evaluate(pool, cfg, preps, model_name, candidates, seeds, penalty, shift)
+            cand = min(evals, key=lambda ev: ev.score)
+            if cand.score < min((1.0 - min_gain) * best.score, best.score - min_abs):
+                best = cand
+                improved = True
+        if not improved:
+            break
+    return default, best
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tbpp_cf2.bench.tuning',
+        description='Tune Gurobi parameters per group of benchmark instances (format 1).',
+    )
+    parser.add_argument('--root', default='./data/TestInstances')
+    parser.add_argument('--groups', nargs='+', default=None,
+                        help='group names as in the log, by default all groups')
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS))
+    parser.add_argument('--instances', type=int, default=4,
+                        help='sampled instances per group')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1],
+                        help='Gurobi seeds, every configuration runs with all of them')
+    parser.add_argument('--sample-seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=60)
+    parser.add_argument('--rounds', type=int, default=2)
+    parser.add_argument('--min-gain', type=float, default=0.05,
+                        help='least relative improvement of the score to change a parameter')
+    parser.add_argument('--min-abs', type=float, default=0.1,
+                        help='least improvement of the score in seconds')
+    parser.add_argument('--gamma', type=float, default=1.0)
+    parser.add_argument('--aggregate', action='store_true')
+    parser.add_argument('--cache', nargs='?', const='', default=None)
+    parser.add_argument('--results', default=None)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', '-o', default='./data/profile.json',
+                        help='profile for the --profile option of the runner, updated in place')
+    args = parser.parse_args(argv)
+
+    cfg = Config(
+        root=args.root,
+        log='',
+        gamma=args.gamma,
+        time_limit=args.time_limit,
+        threads=args.threads,
+        cache=args.cache,
+        results=args.results,
+        aggregate=args.aggregate,
+    )
+    groups = args.groups
+    if groups is None:
+        groups = [f'n{n} t{t} {cat}' for n, t, cat in format1.get_groups(args.root)]
+
+    profile = {}
+    if os.path.exists(args.output):
+        with open(args.output) as f:
+            profile = json.load(f)
+
+    processes = args.processes or max(1, (os.cpu_count() or 1) // args.threads)
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes, initializer=_init_worker, initargs=(args.threads,)) as pool:
+        for group_name in groups:
+            names = sample_instances(args.root, group_name, args.instances, args.sample_seed)
+            preps = pool.map(_prepare, [(cfg, group_name, name) for name in names])
+            for model_name in args.models:
+                default, best = tune_group(
+                    pool, cfg, preps, model_name, args.seeds,
+                    rounds=args.rounds, min_gain=args.min_gain, min_abs=args.min_abs,
+                )
+                print(
+                    f'{group_name} {model_name}: {default.score:.1f}s ({default.solved}/{default.runs}) -> '
+                    f'{best.score:.1f}s ({best.solved}/{best.runs}) with {best.params}'
+                )
+                profile.setdefault(group_name, {})[model_name] = best.params
+                # written after every model, tuning runs take long
+                with open(args.output, 'w') as f:
+                    json.dump(profile, f, indent=1, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import dataclasses
+import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .instance import InstanceTBPP, InstanceTBPPFU
+from .util import compute_cliques
+
+__all__ = ['peak_load_bound', 'bin_packing_bound', 'Bounds', 'compute_bounds']
+
+
+def peak_load_bound(inst: InstanceTBPP) -> int:
+    # sweep over the start and end events, ends before starts at equal times
+    s = np.asarray(inst.s)
+    e = np.asarray(inst.e)
+    c = np.asarray(inst.c)
+    times = np.concatenate([e, s])
+    delta = np.concatenate([-c, c])
+    order = np.lexsort((delta, times))
+    load = np.cumsum(delta[order])
+    return int(math.ceil(load.max() / inst.cap - 1e-9)) if len(load) > 0 else 0
+
+
+def bin_packing_bound(c: np.ndarray, cap: int) -> int:
+    """Bound L2 of Martello and Toth for the bin packing problem."""
+    c = np.sort(np.asarray(c))
+    if len(c) == 0:
+        return 0
+    csum = np.concatenate([[0], np.cumsum(c)])
+    half = np.searchsorted(c, cap / 2, side='right')
+    best = 0
+    for k in np.concatenate([[0], np.unique(c[:half])]):
+        # J1: c > cap - k, J2: cap / 2 < c <= cap - k, J3: k <= c <= cap / 2
+        a1 = np.searchsorted(c, cap - k, side='right')
+        a3 = np.searchsorted(c, k, side='left')
+        n12 = len(c) - half
+        n2 = a1 - half
+        free2 = n2 * cap - (csum[a1] - csum[half])
+        sum3 = csum[half] - csum[a3]
+        best = max(best, n12 + max(0, int(math.ceil((sum3 - free2) / cap - 1e-9))))
+    return int(best)
+
+
+def _clique_bounds(args):
+    sizes, cap = args
+    return [bin_packing_bound(c, cap) for c in sizes]
+
+
+def _components(inst: InstanceTBPP) -> list[int]:
+    # index of the connected component of the union of the intervals, where
+    # touching intervals are connected as in the fire-up constraints
+    comp = [0] * inst.n
+    order = sorted(range(inst.n), key=lambda i: inst.s[i])
+    idx = -1
+    last_e = float('-inf')
+    for i in order:
+        if inst.s[i] > last_e:
+            idx += 1
+        last_e = max(last_e, inst.e[i])
+        comp[i] = idx
+    return comp
+
+
+@dataclasses.dataclass
+class Bounds:
+    servers: int
+    fireups: int
+    value: float
+
+
+def compute_bounds(inst: InstanceTBPPFU, workers: int = 1, chunk_size: int = 256) -> Bounds:
+    """Lower bounds on the server count, the fire-up count and the objective.
+
+    At every time point, the active jobs have to be packed into the active
+    servers, so the bin packing bound of each clique of `compute_cliques`
+    bounds the number of servers. All servers are switched off between the
+    connected components of the union of the intervals, hence every
+    component needs as many fire-ups as servers are active at the same
+    time. The clique bounds are computed in `workers` processes.
+    """
+    cliques = compute_cliques(inst)
+    sizes = [np.array([inst.c[j] for j in cl]) for cl in cliques]
+    chunks = [
+        (sizes[a:a + chunk_size], inst.cap)
+        for a in range(0, len(sizes), chunk_size)
+    ]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            lbs = [lb for res in pool.map(_clique_bounds, chunks) for lb in res]
+    else:
+        lbs = [lb for chunk in chunks for lb in _clique_bounds(chunk)]
+
+    servers = int(max([peak_load_bound(inst)] + lbs))
+
+    comp = _components(inst)
+    comp_lb = dict[int, int]()
+    for cl, lb in zip(cliques, lbs):
+        idx = comp[next(iter(cl))]
+        comp_lb[idx] = max(comp_lb.get(idx, 0), lb)
+    fireups = max(servers, sum(comp_lb.values()))
+
+    gamma = getattr(inst, 'gamma', 0.0)
+    return Bounds(servers, fireups, servers + gamma * fireups)
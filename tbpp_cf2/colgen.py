@@ -0,0 +1,254 @@
+import bisect
+import dataclasses
+import heapq
+import itertools
+import math
+import time
+from collections.abc import Collection
+from typing import Optional
+import gurobipy as gp
+from .instance import InstanceTBPPFU
+from .heuristic import best_look_ahead
+
+__all__ = ['price', 'ColGenResult', 'column_generation', 'best_allocation']
+
+Pattern = frozenset[int]
+
+
+def _pattern_cost(inst: InstanceTBPPFU, pat: Pattern) -> float:
+    return inst.compute_value([pat])
+
+
+def price(
+    inst: InstanceTBPPFU, duals: list[float],
+    max_labels: Optional[int] = None, max_columns: int = 10,
+    deadline: Optional[float] = None,
+) -> tuple[float, list[Pattern], bool]:
+    """Find patterns maximizing the sum of the duals minus the cost.
+
+    Dynamic program over the jobs sorted by start time. The state of a label
+    consists of the end times and sizes of the chosen jobs that are still
+    running (or end exactly at the current start, which avoids a fire-up).
+    Labels with equal states are merged, and labels that cannot beat the
+    best pattern so far, even with all remaining positive duals, are
+    dropped. With `max_labels`, only the best labels are kept after every
+    job, which makes the pricing heuristic.
+
+    Returns the best value (at least 0), the patterns of positive value and
+    whether the value is exact.
+    """
+    order = sorted(range(inst.n), key=lambda i: (inst.s[i], inst.e[i]))
+    # sum of the positive duals of the remaining jobs
+    rem = [0.0] * (inst.n + 1)
+    for idx in reversed(range(inst.n)):
+        rem[idx] = rem[idx + 1] + max(0.0, duals[order[idx]])
+
+    exact = True
+    best = 0.0
+    # heap of the best patterns found, as (value, counter, chain)
+    found = []
+    counter = itertools.count()
+    # state -> (value without the server cost, chosen jobs as linked list)
+    labels = {(): (0.0, None)}
+    for idx, i in enumerate(order):
+        if deadline is not None and time.time() > deadline:
+            exact = False
+            break
+        si, ei, ci = inst.s[i], inst.e[i], inst.c[i]
+        new = dict[tuple, tuple]()
+
+        def keep(state, val, chain):
+            if state not in new or new[state][0] < val:
+                new[state] = (val, chain)
+
+        for state, (val, chain) in labels.items():
+            if val + rem[idx] - 1.0 <= best:
+                continue
+            # the state is sorted by end time
+            state = state[bisect.bisect_left(state, (si,)):]
+            keep(state, val, chain)
+            load = sum(c for e, c in state if e > si)
+            if load + ci <= inst.cap:
+                fireup = inst.gamma if len(state) == 0 else 0.0
+                val_i = val + duals[i] - fireup
+                state_i = list(state)
+                bisect.insort(state_i, (ei, ci))
+                keep(tuple(state_i), val_i, (i, chain))
+                if val_i - 1.0 > 1e-9:
+                    item = (val_i - 1.0, next(counter), (i, chain))
+                    if len(found) < max_columns:
+                        heapq.heappush(found, item)
+                    elif item > found[0]:
+                        heapq.heapreplace(found, item)
+                best = max(best, val_i - 1.0)
+
+        if max_labels is not None and len(new) > max_labels:
+            exact = False
+            new = dict(heapq.nlargest(max_labels, new.items(), key=lambda it: it[1][0]))
+        labels = new
+
+    def decode(chain):
+        pat = set()
+        while chain is not None:
+            i, chain = chain
+            pat.add(i)
+        return frozenset(pat)
+
+    columns = [decode(chain) for _, _, chain in sorted(found, reverse=True)]
+    return best, columns, exact
+
+
+@dataclasses.dataclass
+class ColGenResult:
+    # Lagrangian lower bound
+    lb: float
+    # value of the restricted master problem, equal to the LP bound if converged
+    value: float
+    columns: list[Pattern]
+    iterations: int
+    converged: bool
+
+
+def column_generation(
+    inst: InstanceTBPPFU,
+    columns: Optional[Collection[Pattern]] = None,
+    ub: Optional[float] = None,
+    time_limit: float = 60.0,
+    alpha: float = 0.5,
+    max_labels: Optional[int] = 200,
+    max_columns: int = 10,
+    tol: float = 1e-6,
+) -> ColGenResult:
+    """Lower bound from the set covering relaxation over all patterns.
+
+    A pattern is a set of jobs on one server that costs one plus gamma
+    times its fire-ups. The duals are smoothed towards the duals that gave
+    the best Lagrangian bound so far (Wentges smoothing with weight
+    `alpha`), which is reduced after a mispricing. Pricing first uses the
+    dynamic program with `max_labels` labels and only runs exactly if this
+    finds no improving column. Every exact pricing gives a Lagrangian bound,
+    which stops the method early once it closes the gap to the restricted
+    master problem (after rounding up if gamma is integral) or reaches `ub`.
+    """
+    t_end = time.time() + time_limit
+    integral = float(inst.gamma).is_integer()
+
+    def done(lb: float, value: float) -> bool:
+        if lb >= value - tol:
+            return True
+        if integral and math.ceil(lb - tol) >= math.ceil(value - tol):
+            return True
+        return ub is not None and lb >= ub - tol
+
+    if columns is None:
+        columns = best_look_ahead(inst, {1, 2, 3})
+    columns = list(dict.fromkeys(
+        [frozenset(pat) for pat in columns] +
+        [frozenset({i}) for i in range(inst.n)]
+    ))
+
+    m = gp.Model()
+    m.setParam('OutputFlag', 0)
+    cover = [m.addLConstr(gp.LinExpr(), gp.GRB.GREATER_EQUAL, 1.0, name=f'cover[{i}]') for i in range(inst.n)]
+
+    def add_column(pat: Pattern):
+        m.addVar(
+            obj=_pattern_cost(inst, pat),
+            column=gp.Column([1.0] * len(pat), [cover[i] for i in pat]),
+        )
+
+    for pat in columns:
+        add_column(pat)
+
+    lb = 0.0
+    center = None
+    a = alpha
+    it = 0
+    converged = False
+    # the restricted master problem is solved at least once for its value
+    while it == 0 or time.time() < t_end:
+        it += 1
+        m.optimize()
+        value = m.ObjVal
+        duals = [con.Pi for con in cover]
+        if center is None:
+            sep = duals
+        else:
+            sep = [a * pc + (1 - a) * pd for pc, pd in zip(center, duals)]
+
+        def improving(pats: list[Pattern]) -> list[Pattern]:
+            return [
+                pat for pat in pats
+                if _pattern_cost(inst, pat) - sum(duals[i] for i in pat) < -tol
+            ]
+
+        best, new, exact = price(inst, sep, max_labels, max_columns, t_end)
+        if max_labels is not None and len(improving(new)) == 0:
+            best, new, exact = price(inst, sep, None, max_columns, t_end)
+
+        if exact:
+            # an optimal solution uses at most value / (1 + gamma) servers,
+            # since every pattern has at least one fire-up
+            lag = sum(sep) - value / (1.0 + inst.gamma) * best
+            if lag > lb:
+                lb = lag
+                center = sep
+        if done(lb, value):
+            converged = lb >= value - tol
+            break
+
+        new = improving(new)
+        if len(new) > 0:
+            for pat in new:
+                add_column(pat)
+                columns.append(pat)
+            a = alpha
+        elif not exact:
+            # out of time
+            break
+        elif a > 0:
+            # mispricing, move the separation point towards the duals
+            a = a / 2 if a > 0.05 else 0.0
+        else:
+            lb = max(lb, value)
+            converged = True
+            break
+
+    return ColGenResult(lb, value, columns, it, converged)
+
+
+def best_allocation(
+    inst: InstanceTBPPFU, columns: Collection[Pattern], time_limit: float = 10.0,
+    start: Optional[Collection[Pattern]] = None,
+) -> list[Pattern]:
+    """Best allocation that partitions the jobs into the given patterns.
+
+    The allocation `start`, by default the heuristic one that also starts
+    `column_generation`, is added to the patterns and is the MIP start, so
+    it is returned if no better allocation is found within the time limit.
+    """
+    if start is None:
+        start = best_look_ahead(inst, {1, 2, 3})
+    start = [frozenset(pat) for pat in start]
+    columns = list(dict.fromkeys([frozenset(pat) for pat in columns] + start))
+    m = gp.Model()
+    m.setParam('OutputFlag', 0)
+    m.setParam('TimeLimit', time_limit)
+    lam = m.addVars(
+        len(columns),
+        obj=[_pattern_cost(inst, pat) for pat in columns],
+        vtype=gp.GRB.BINARY,
+    )
+    m.addConstrs((
+        gp.quicksum(lam[p] for p, pat in enumerate(columns) if i in pat) == 1
+        for i in range(inst.n)
+    ), name='partition')
+    used = set(start)
+    for p, pat in enumerate(columns):
+        lam[p].Start = 1 if pat in used else 0
+    m.optimize()
+    if m.Status == gp.GRB.Status.INTERRUPTED:
+        raise KeyboardInterrupt()
+    if m.SolCount == 0:
+        return start
+    return [pat for p, pat in enumerate(columns) if lam[p].X > 0.5]
@@ -1,2 +1,3 @@
 from . import format1
 from . import format2
+from . import cache
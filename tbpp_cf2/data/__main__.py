@@ -0,0 +1,3 @@
+from .cache import main
+
+main()
@@ -0,0 +1,192 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Iterator
+from typing import Optional
+import numpy as np
+from .. import InstanceTBPP
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__all__ = ['Store']
+
+ROOT_GROUP = '.'
+
+
+def _atomic_write(path: str, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class Store:
+    """Binary copy of a directory of instances.
+
+    The jobs of all instances of a group are stored in one array of shape
+    `(3, total)` holding the rows `s`, `e` and `c`, which is memory-mapped
+    when the group is first accessed. The instances returned are views into
+    this array. An index file records the names, offsets and capacities of
+    the instances and the state of the source files (modification time and
+    size, or a content hash if `check='hash'`). Groups whose sources changed
+    are converted again on access.
+
+    fmt: 1 for the subdirectory layout of `format1` (one group per
+        directory), 2 for the flat layout of `format2` (a single group '.')
+    """
+
+    def __init__(self, root: str, path: Optional[str] = None, fmt: int = 1, check: str = 'mtime'):
+        assert fmt in {1, 2}
+        assert check in {'mtime', 'hash'}
+        self.root = root
+        self.path = os.path.join(root, '.cache') if path is None else path
+        self.fmt = fmt
+        self.check = check
+        self._index_path = os.path.join(self.path, 'index.json')
+        self._index = None
+        self._arrays = dict[str, np.ndarray]()
+
+    def _group_files(self, group: str) -> list[str]:
+        if self.fmt == 1:
+            return sorted(glob.glob(os.path.join(self.root, group, '*.txt')))
+        from .format2 import PATTERN
+        return sorted(
+            f for f in glob.glob(os.path.join(self.root, '*.txt'))
+            if PATTERN.search(os.path.basename(f)) is not None
+        )
+
+    def _source_state(self, files: list[str]) -> list:
+        if self.check == 'hash':
+            state = []
+            for f in files:
+                with open(f, 'rb') as fh:
+                    state.append(hashlib.sha1(fh.read()).hexdigest())
+            return state
+        return [[st.st_mtime_ns, st.st_size] for st in map(os.stat, files)]
+
+    def _read_file(self, f: str) -> InstanceTBPP:
+        if self.fmt == 1:
+            from .format1 import read_file
+        else:
+            from .format2 import read_file
+        return read_file(f)
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self._index_path) as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = dict(format=self.fmt, groups={})
+        return self._index
+
+    def _save_index(self):
+        data = json.dumps(self.index).encode()
+        _atomic_write(self._index_path, lambda f: f.write(data))
+
+    def _convert(self, group: str, files: list[str], state: list):
+        os.makedirs(self.path, exist_ok=True)
+        insts = [self._read_file(f) for f in files]
+        offsets = np.cumsum([0] + [inst.n for inst in insts]).tolist()
+        arr = np.empty((3, offsets[-1]), dtype=np.int64)
+        for a, b, inst in zip(offsets, offsets[1:], insts):
+            arr[0, a:b] = inst.s
+            arr[1, a:b] = inst.e
+            arr[2, a:b] = inst.c
+        file = hashlib.sha1(group.encode()).hexdigest()[:16] + '.npy'
+        _atomic_write(os.path.join(self.path, file), lambda f: np.save(f, arr))
+
+        # other processes may convert other groups at the same time, so the
+        # index is read again and updated under a lock
+        lock = os.open(os.path.join(self.path, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._index = None
+            self.index['groups'][group] = dict(
+                file=file,
+                names=[os.path.basename(f) for f in files],
+                offsets=offsets,
+                caps=[int(inst.cap) for inst in insts],
+                sources=state,
+            )
+            self._save_index()
+        finally:
+            os.close(lock)
+        self._arrays.pop(group, None)
+
+    def _entry(self, group: str, validate: bool = True) -> dict:
+        entry = self.index['groups'].get(group)
+        if entry is not None and not validate:
+            return entry
+        files = self._group_files(group)
+        if entry is not None and len(files) == 0:
+            # the store can be used without the sources
+            return entry
+        names = [os.path.basename(f) for f in files]
+        state = self._source_state(files)
+        if entry is None or entry['names'] != names or entry['sources'] != state:
+            self._convert(group, files, state)
+            entry = self.index['groups'][group]
+        return entry
+
+    def build(self):
+        """Convert all groups whose sources changed."""
+        for group in self.groups():
+            self._entry(group)
+
+    def groups(self) -> list[str]:
+        if not os.path.isdir(self.root):
+            return sorted(self.index['groups'])
+        if self.fmt == 2:
+            return [ROOT_GROUP]
+        return sorted(
+            os.path.basename(p)
+            for p in glob.glob(os.path.join(self.root, '*'))
+            if os.path.isdir(p)
+        )
+
+    def _array(self, group: str, entry: dict) -> np.ndarray:
+        arr = self._arrays.get(group)
+        if arr is None:
+            arr = np.load(os.path.join(self.path, entry['file']), mmap_mode='r')
+            self._arrays[group] = arr
+        return arr
+
+    def instances(self, group: str = ROOT_GROUP, validate: bool = True) -> Iterator[tuple[str, InstanceTBPP]]:
+        entry = self._entry(group, validate)
+        arr = self._array(group, entry)
+        offsets = entry['offsets']
+        for name, a, b, cap in zip(entry['names'], offsets, offsets[1:], entry['caps']):
+            yield name, InstanceTBPP(s=arr[0, a:b], e=arr[1, a:b], c=arr[2, a:b], cap=cap)
+
+    def get(self, group: str, name: str, validate: bool = False) -> InstanceTBPP:
+        entry = self._entry(group, validate)
+        idx = entry['names'].index(name)
+        a, b = entry['offsets'][idx:idx + 2]
+        arr = self._array(group, entry)
+        return InstanceTBPP(s=arr[0, a:b], e=arr[1, a:b], c=arr[2, a:b], cap=entry['caps'][idx])
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tbpp_cf2.data',
+        description='Convert a directory of instances into a binary store.',
+    )
+    parser.add_argument('root')
+    parser.add_argument('--path', default=None)
+    parser.add_argument('--format', type=int, choices=[1, 2], default=1)
+    parser.add_argument('--check', choices=['mtime', 'hash'], default='mtime')
+    args = parser.parse_args(argv)
+    Store(args.root, args.path, args.format, args.check).build()
@@ -1,7 +1,9 @@
 import glob
 import os
+from typing import Union
 import numpy as np
 from .. import InstanceTBPP
+from .cache import Store
 
 __all__ = ['read_file', 'get_groups', 'read_instances']
 
@@ -16,10 +18,24 @@ def read_file(filename):
     return InstanceTBPP(s=s, e=e, c=c, cap=cap)
 
 
-def get_groups(root):
+def _store(root, cache: Union[bool, Store]):
+    if cache is True:
+        return Store(root)
+    return cache or None
+
+
+def get_groups(root, cache: Union[bool, Store] = False):
+    store = _store(root, cache)
+    if store is not None:
+        group_names = store.groups()
+    else:
+        group_names = [
+            os.path.basename(group_path)
+            for group_path in glob.glob(os.path.join(root, '*'))
+        ]
+
     groups = []
-    for group_path in sorted(glob.glob(os.path.join(root, '*'))):
-        group_name = os.path.basename(group_path)
+    for group_name in group_names:
         tmp = group_name.split(' ')
         groups.append((int(tmp[0][1:]), int(tmp[1][1:]), tmp[2]))
 
@@ -27,7 +43,13 @@ def get_groups(root):
     return groups
 
 
-def read_instances(root, group_name):
+def read_instances(root, group_name, cache: Union[bool, Store] = False):
+    store = _store(root, cache)
+    if store is not None:
+        # memory-mapped views into the binary store
+        yield from store.instances(group_name)
+        return
+
     for inst_path in sorted(glob.glob(os.path.join(root, group_name, '*.txt'))):
         inst_name = os.path.basename(inst_path)
         inst = read_file(inst_path)
@@ -1,10 +1,14 @@
 import glob
 import os
 import re
+from typing import Union
 from .. import InstanceTBPP
+from .cache import ROOT_GROUP, Store
 
 __all__ = ['read_file', 'read_instances']
 
+PATTERN = re.compile(r'I_(?P<it>\d+)\.txt_(?P<tau>\d+)_(?P<cap>\d+)\.txt')
+
 
 def read_file(f):
     lines = open(f).read().split('\n')
@@ -16,26 +20,31 @@ def read_file(f):
     active = set()
     for t, step in enumerate(rem):
         items = set([int(v) for v in step.split('\t') if len(v) > 0])
-        for item in active.copy():
-            if item not in items:
-                active.remove(item)
-                e[item] = t
-        for item in items:
-            if item not in active:
-                active.add(item)
-                s[item] = t
+        for item in active - items:
+            e[item] = t
+        for item in items - active:
+            s[item] = t
+        active = items
     tlast = len(rem)
     for item in active:
         e[item] = tlast
     return InstanceTBPP(s=s, e=e, c=c, cap=cap)
 
 
-def read_instances(root):
-    files = glob.glob(os.path.join(root, '*.txt'))
+def read_instances(root, cache: Union[bool, Store] = False):
+    if cache is True:
+        cache = Store(root, fmt=2)
+    # memory-mapped views into the binary store
+    cached = dict(cache.instances(ROOT_GROUP)) if cache else {}
+
+    if cache and not os.path.isdir(root):
+        files = list(cached)
+    else:
+        files = glob.glob(os.path.join(root, '*.txt'))
     instances = []
     for f in files:
         b = os.path.basename(f)
-        m = re.search('I_(?P<it>\d+)\.txt_(?P<tau>\d+)_(?P<cap>\d+)\.txt', b)
+        m = PATTERN.search(b)
         if m is None:
             continue
         res = dict(
@@ -45,5 +54,7 @@ def read_instances(root):
             file=b,
         )
         res['cls'] = 1 + (res['it'] - 1) // 10
+        if cache:
+            res['inst'] = cached[b]
         instances.append(res)
     return instances
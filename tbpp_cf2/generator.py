@@ -0,0 +1,116 @@
+from collections.abc import Iterator
+from typing import Union
+import numpy as np
+from .instance import InstanceTBPP
+
+__all__ = ['generate', 'iter_chunks']
+
+Seed = Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+STARTS = {'uniform', 'bursty', 'heavy'}
+DURATIONS = {'uniform', 'exponential', 'heavy'}
+SIZES = {'uniform', 'heavy'}
+
+
+def _start_chunks(rng: np.random.Generator, n: int, chunk_size: int, max_s: int, start: str, shape: float, alpha: float):
+    if start == 'heavy':
+        # arrival process with Pareto inter-arrival times, scaled such that
+        # the expected last arrival is at max_s
+        scale = (shape - 1.0) * max_s / n
+        t = 0.0
+        for a in range(0, n, chunk_size):
+            ts = t + np.cumsum(rng.pareto(shape, min(chunk_size, n - a)) * scale)
+            t = ts[-1]
+            yield 1 + ts.astype(np.int64)
+        return
+
+    # number of arrivals per time step, uniform or concentrated in bursts
+    if start == 'uniform':
+        p = np.full(max_s, 1.0 / max_s)
+    else:
+        p = rng.dirichlet(np.full(max_s, alpha))
+    counts = rng.multinomial(n, p)
+    if chunk_size >= n:
+        yield np.repeat(np.arange(1, max_s + 1), counts)
+        return
+    cum = np.cumsum(counts)
+    for a in range(0, n, chunk_size):
+        pos = np.arange(a, min(n, a + chunk_size))
+        yield 1 + np.searchsorted(cum, pos, side='right')
+
+
+def _durations(rng: np.random.Generator, size: int, max_dt: int, duration: str, shape: float):
+    if duration == 'uniform':
+        return rng.integers(1, max_dt + 1, size)
+    if duration == 'exponential':
+        return 1 + rng.exponential((max_dt - 1) / 2, size).astype(np.int64)
+    # Pareto tail, but with the same median as the uniform durations
+    scale = (max_dt - 1) / 2 / (2 ** (1 / shape) - 1)
+    return 1 + (rng.pareto(shape, size) * scale).astype(np.int64)
+
+
+def _sizes(rng: np.random.Generator, size: int, min_c: int, max_c: int, dist: str, shape: float):
+    if dist == 'uniform':
+        return rng.integers(min_c, max_c + 1, size)
+    # mostly small items and a few large ones
+    scale = (max_c - min_c) / 10
+    c = min_c + (rng.pareto(shape, size) * scale).astype(np.int64)
+    return np.minimum(c, max_c)
+
+
+def _argsort(s: np.ndarray, e: np.ndarray, c: np.ndarray):
+    # a single sort of a combined key is much faster than np.lexsort,
+    # the starts are already ordered, hence a stable sort works best
+    e_max, c_max = int(e.max()) + 1, int(c.max()) + 1
+    if (int(s.max()) + 1) * e_max * c_max >= 2 ** 63:
+        return np.lexsort((c, e, s))
+    return np.argsort((s * e_max + e) * c_max + c, kind='stable')
+
+
+def iter_chunks(
+    n: int, cap: int, chunk_size: int, seed: Seed = None,
+    max_s: int = 10, max_dt: int = 10, min_c: int = 1, max_c: int = -1,
+    start: str = 'uniform', duration: str = 'uniform', size: str = 'uniform',
+    shape: float = 1.5, alpha: float = 0.1, sort: bool = True,
+) -> Iterator[InstanceTBPP]:
+    """Generate a random instance in chunks of at most `chunk_size` jobs.
+
+    The fields of the yielded instances are NumPy arrays. The chunks are in
+    order of their start times. Within each chunk, the jobs are sorted like
+    in `InstanceTBPP.sorted` if `sort` is set. The durations and sizes are
+    drawn per chunk, so for the same seed the jobs differ from those of
+    `generate` (and of other chunk sizes) unless `chunk_size >= n`.
+
+    start: 'uniform' (on 1..max_s), 'bursty' (arrival rates from a
+        Dirichlet distribution with concentration `alpha`) or 'heavy'
+        (Pareto inter-arrival times with shape `shape`, which needs
+        `shape > 1` for a finite mean)
+    duration: 'uniform' (on 1..max_dt), 'exponential' or 'heavy' (Pareto)
+    size: 'uniform' (on min_c..max_c) or 'heavy' (Pareto, cut at max_c)
+    """
+    assert n > 0
+    assert start in STARTS and duration in DURATIONS and size in SIZES
+    assert shape > 0
+    # the inter-arrival times are scaled by their mean
+    assert start != 'heavy' or shape > 1, "start='heavy' needs shape > 1"
+    if max_c == -1:
+        max_c = cap
+    assert 1 <= min_c <= max_c <= cap
+    rng = np.random.default_rng(seed)
+    for s in _start_chunks(rng, n, chunk_size, max_s, start, shape, alpha):
+        e = s + _durations(rng, len(s), max_dt, duration, shape)
+        c = _sizes(rng, len(s), min_c, max_c, size, shape)
+        if sort:
+            idx = _argsort(s, e, c)
+            s, e, c = s[idx], e[idx], c[idx]
+        yield InstanceTBPP(s, e, c, cap)
+
+
+def generate(n: int, cap: int, seed: Seed = None, **kwargs) -> InstanceTBPP:
+    """Generate a random instance whose fields are NumPy arrays.
+
+    See `iter_chunks` for the remaining arguments. This is the single chunk
+    of `iter_chunks` with `chunk_size=n`; other chunk sizes give different
+    instances for the same seed.
+    """
+    return next(iter_chunks(n, cap, max(n, 1), seed, **kwargs))
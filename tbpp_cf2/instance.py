@@ -1,6 +1,5 @@
 import dataclasses
 from collections.abc import Collection
-from random import randint
 
 Pattern = frozenset[int]
 Allocation = list[Pattern]
@@ -48,13 +47,13 @@ class InstanceTBPP:
         return InstanceTBPP(s, e, c, self.cap)
 
     @classmethod
-    def random(cls, n: int, cap: int, max_s: int = 10, max_dt: int = 10, min_c: int = 1, max_c: int = -1):
-        if max_c == -1:
-            max_c = cap
-        s = [randint(1, max_s) for _ in range(n)]
-        e = [si + randint(1, max_dt) for si in s]
-        c = [randint(min_c, max_c) for _ in range(n)]
-        return InstanceTBPP(s, e, c, cap).sorted()
+    def random(cls, n: int, cap: int, max_s: int = 10, max_dt: int = 10, min_c: int = 1, max_c: int = -1, seed=None):
+        from .generator import generate
+        inst = generate(
+            n, cap, seed,
+            max_s=max_s, max_dt=max_dt, min_c=min_c, max_c=max_c,
+        )
+        return InstanceTBPP(inst.s.tolist(), inst.e.tolist(), inst.c.tolist(), cap)
 
     @property
     def jobs_for_time(self):
@@ -70,7 +69,8 @@ class InstanceTBPPFU(InstanceTBPP):
 
     @staticmethod
     def extend(inst: InstanceTBPP, gamma: float):
-        return InstanceTBPPFU(**dataclasses.asdict(inst), gamma=gamma)
+        # share the data instead of the deep copy of dataclasses.asdict
+        return InstanceTBPPFU(inst.s, inst.e, inst.c, inst.cap, gamma=gamma)
 
     def compute_value(self, alloc: Allocation) -> float:
         fireups = 0
@@ -90,5 +90,5 @@ class InstanceTBPPFU(InstanceTBPP):
         return InstanceTBPPFU.extend(super().sub(subset), self.gamma)
 
     @classmethod
-    def random(cls, n: int, cap: int, max_s: int = 10, max_dt: int = 10, min_c: int = 1, max_c: int = -1, gamma: float = 1.0):
-        return InstanceTBPPFU.extend(super().random(n, cap, max_s, max_dt, min_c, max_c), gamma)
+    def random(cls, n: int, cap: int, max_s: int = 10, max_dt: int = 10, min_c: int = 1, max_c: int = -1, gamma: float = 1.0, seed=None):
+        return InstanceTBPPFU.extend(super().random(n, cap, max_s, max_dt, min_c, max_c, seed), gamma)
@@ -0,0 +1,712 @@
+import dataclasses
+import itertools
+import math
+import time
+from collections.abc import Iterable
+from typing import Any, Optional
+import numpy as np
+
+__all__ = [
+    'CONTINUOUS', 'BINARY', 'INTEGER', 'MINIMIZE', 'MAXIMIZE',
+    'LESS_EQUAL', 'GREATER_EQUAL', 'EQUAL', 'INFINITY', 'UNDEFINED', 'VAR_ATTRS', 'Status',
+    'Var', 'LinExpr', 'TempConstr', 'Constr', 'VarDict', 'quicksum',
+    'Model', 'LinearModel', 'to_gurobi', 'solve_highs', 'write_mps',
+    'BACKENDS', 'export',
+]
+
+# the constants have the values of their counterparts in gurobipy.GRB
+CONTINUOUS = 'C'
+BINARY = 'B'
+INTEGER = 'I'
+MINIMIZE = 1
+MAXIMIZE = -1
+LESS_EQUAL = '<'
+GREATER_EQUAL = '>'
+EQUAL = '='
+INFINITY = 1e100
+UNDEFINED = 1e101
+# variable attributes that are only passed on to Gurobi
+VAR_ATTRS = ('BranchPriority', 'VarHintVal', 'VarHintPri')
+
+
+class Status:
+    LOADED = 1
+    OPTIMAL = 2
+    INFEASIBLE = 3
+    UNBOUNDED = 5
+    NODE_LIMIT = 8
+    TIME_LIMIT = 9
+    NUMERIC = 12
+
+
+def _var_attr(name: str, default: float):
+    def get(self) -> float:
+        return self.model.attrs[name].get(self.index, default)
+
+    def set(self, value: float):
+        self.model.attrs[name][self.index] = value
+
+    return property(get, set)
+
+
+class Var:
+    __slots__ = ('model', 'index')
+    # let numpy scalars defer to the operators below
+    __array_ufunc__ = None
+
+    def __init__(self, model: 'Model', index: int):
+        self.model = model
+        self.index = index
+
+    def _expr(self) -> 'LinExpr':
+        return LinExpr(self.model, [self.index], [1.0])
+
+    def __add__(self, other):
+        return self._expr().__iadd__(other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self._expr().__isub__(other)
+
+    def __rsub__(self, other):
+        return LinExpr(self.model, [self.index], [-1.0]).__iadd__(other)
+
+    def __mul__(self, a):
+        if isinstance(a, (Var, LinExpr)):
+            return NotImplemented
+        return LinExpr(self.model, [self.index], [float(a)])
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return LinExpr(self.model, [self.index], [-1.0])
+
+    def __le__(self, other):
+        return TempConstr(self - other, LESS_EQUAL)
+
+    def __ge__(self, other):
+        return TempConstr(self - other, GREATER_EQUAL)
+
+    def __eq__(self, other):
+        return TempConstr(self - other, EQUAL)
+
+    __hash__ = object.__hash__
+
+    @property
+    def X(self) -> float:
+        return float(self.model.solution[self.index])
+
+    @property
+    def Start(self) -> float:
+        return self.model.start.get(self.index, math.nan)
+
+    @Start.setter
+    def Start(self, value: float):
+        self.model.start[self.index] = value
+
+    BranchPriority = _var_attr('BranchPriority', 0)
+    VarHintVal = _var_attr('VarHintVal', math.nan)
+    VarHintPri = _var_attr('VarHintPri', 0)
+
+    @property
+    def LB(self) -> float:
+        return self.model.lb[self.index]
+
+    @property
+    def UB(self) -> float:
+        return self.model.ub[self.index]
+
+    @property
+    def VType(self) -> str:
+        return self.model.vtype[self.index]
+
+    @property
+    def VarName(self) -> str:
+        return self.model.var_names[self.index]
+
+    def __repr__(self):
+        return f'<ir.Var {self.VarName}>'
+
+
+class LinExpr:
+    """Linear expression as lists of variable indices and coefficients,
+    which may contain an index more than once."""
+    __slots__ = ('model', 'idx', 'coef', 'const')
+    __array_ufunc__ = None
+
+    def __init__(self, model: Optional['Model'] = None, idx: Optional[list[int]] = None,
+                 coef: Optional[list[float]] = None, const: float = 0.0):
+        self.model = model
+        self.idx = [] if idx is None else idx
+        self.coef = [] if coef is None else coef
+        self.const = const
+
+    def copy(self) -> 'LinExpr':
+        return LinExpr(self.model, list(self.idx), list(self.coef), self.const)
+
+    def _add(self, other, sign: float):
+        if isinstance(other, Var):
+            self.model = other.model
+            self.idx.append(other.index)
+            self.coef.append(sign)
+        elif isinstance(other, LinExpr):
+            if other.model is not None:
+                self.model = other.model
+            self.idx.extend(other.idx)
+            self.coef.extend(other.coef if sign == 1.0 else [-c for c in other.coef])
+            self.const += sign * other.const
+        else:
+            self.const += sign * float(other)
+        return self
+
+    def __iadd__(self, other):
+        return self._add(other, 1.0)
+
+    def __isub__(self, other):
+        return self._add(other, -1.0)
+
+    def __add__(self, other):
+        return self.copy()._add(other, 1.0)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self.copy()._add(other, -1.0)
+
+    def __rsub__(self, other):
+        return (-self)._add(other, 1.0)
+
+    def __mul__(self, a):
+        if isinstance(a, (Var, LinExpr)):
+            return NotImplemented
+        a = float(a)
+        return LinExpr(self.model, list(self.idx), [a * c for c in self.coef], a * self.const)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return self * -1.0
+
+    def __le__(self, other):
+        return TempConstr(self - other, LESS_EQUAL)
+
+    def __ge__(self, other):
+        return TempConstr(self - other, GREATER_EQUAL)
+
+    def __eq__(self, other):
+        return TempConstr(self - other, EQUAL)
+
+    __hash__ = None
+
+    def size(self) -> int:
+        return len(self.idx)
+
+    def getConstant(self) -> float:
+        return self.const
+
+    def getValue(self) -> float:
+        if self.model is None:
+            return self.const
+        x = self.model.solution
+        return float(sum(c * x[i] for i, c in zip(self.idx, self.coef)) + self.const)
+
+    def __repr__(self):
+        names = self.model.var_names if self.model is not None else []
+        terms = ' + '.join(f'{c:g} {names[i]}' for i, c in zip(self.idx, self.coef))
+        return f'<ir.LinExpr: {terms} + {self.const:g}>'
+
+
+@dataclasses.dataclass
+class TempConstr:
+    # expr (sense) 0
+    expr: LinExpr
+    sense: str
+
+
+class Constr:
+    __slots__ = ('model', 'index')
+
+    def __init__(self, model: 'Model', index: int):
+        self.model = model
+        self.index = index
+
+    @property
+    def RHS(self) -> float:
+        return self.model.rhs[self.index]
+
+    @RHS.setter
+    def RHS(self, value: float):
+        self.model.rhs[self.index] = value
+
+    @property
+    def Sense(self) -> str:
+        return self.model.sense[self.index]
+
+    @property
+    def ConstrName(self) -> str:
+        return self.model.constr_names[self.index]
+
+
+def quicksum(terms: Iterable) -> LinExpr:
+    expr = LinExpr()
+    idx = expr.idx
+    coef = expr.coef
+    for t in terms:
+        if type(t) is Var:
+            expr.model = t.model
+            idx.append(t.index)
+            coef.append(1.0)
+        else:
+            expr._add(t, 1.0)
+    return expr
+
+
+class VarDict(dict):
+    """Variables by key with the wildcard sums of `gurobipy.tupledict`."""
+
+    def sum(self, *pattern) -> LinExpr:
+        if len(pattern) == 0 or all(p == '*' for p in pattern):
+            return quicksum(self.values())
+        fixed = tuple(pos for pos, p in enumerate(pattern) if p != '*')
+        # index of the keys by their values at the fixed positions
+        index = self.__dict__.setdefault('_index', {})
+        if fixed not in index:
+            groups = dict[tuple, list[Var]]()
+            for key, v in self.items():
+                key = key if isinstance(key, tuple) else (key,)
+                groups.setdefault(tuple(key[pos] for pos in fixed), []).append(v)
+            index[fixed] = groups
+        return quicksum(index[fixed].get(tuple(pattern[pos] for pos in fixed), []))
+
+
+def _keys(indices: tuple) -> list:
+    def expand(ind):
+        return range(ind) if isinstance(ind, int) else ind
+
+    if len(indices) == 1:
+        return list(expand(indices[0]))
+    return list(itertools.product(*map(expand, indices)))
+
+
+def _per_key(value, keys: list) -> list:
+    if isinstance(value, dict):
+        return [value[key] for key in keys]
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return list(value)
+    return [value] * len(keys)
+
+
+def _key_str(key) -> str:
+    return ','.join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+class Model:
+    """Solver independent model with a subset of the `gurobipy.Model` API.
+
+    Variables and rows are stored in flat lists, which `to_arrays` turns
+    into a `LinearModel`. As in gurobipy, attributes starting with an
+    underscore are user data, which `to_gurobi` carries over, replacing
+    the variables and expressions by their Gurobi counterparts. `optimize`
+    solves the model with HiGHS, which ignores the start values, branch
+    priorities and hints (`VAR_ATTRS`). NumNZs
+    counts the entries as added, before repeated variables of a row are
+    merged.
+    """
+
+    def __init__(self, name: str = ''):
+        self.ModelName = name
+        self.ModelSense = MINIMIZE
+        self.lb = list[float]()
+        self.ub = list[float]()
+        self.obj = list[float]()
+        self.obj_const = 0.0
+        self.vtype = list[str]()
+        self.var_names = list[str]()
+        # rows in compressed sparse row format
+        self.row_ptr = [0]
+        self.row_idx = list[int]()
+        self.row_coef = list[float]()
+        self.sense = list[str]()
+        self.rhs = list[float]()
+        self.constr_names = list[str]()
+        self.removed = set[int]()
+        self.params = dict[str, Any]()
+        self.start = dict[int, float]()
+        self.attrs = {name: dict[int, float]() for name in VAR_ATTRS}
+        self.solution = None
+        self.Status = Status.LOADED
+        self.SolCount = 0
+        self.ObjVal = math.nan
+        self.ObjBound = math.nan
+        self.Runtime = 0.0
+        self.NodeCount = 0
+
+    # variables
+
+    def addVar(self, lb: float = 0.0, ub: float = INFINITY, obj: float = 0.0,
+               vtype: str = CONTINUOUS, name: str = '') -> Var:
+        v = Var(self, len(self.lb))
+        self.lb.append(float(lb))
+        self.ub.append(float(ub))
+        self.obj.append(float(obj))
+        self.vtype.append(vtype)
+        self.var_names.append(name or f'C{v.index}')
+        return v
+
+    def addVars(self, *indices, lb=0.0, ub=INFINITY, obj=0.0,
+                vtype=CONTINUOUS, name: str = 'x') -> VarDict:
+        keys = _keys(indices)
+        n0 = len(self.lb)
+        self.lb.extend(map(float, _per_key(lb, keys)))
+        self.ub.extend(map(float, _per_key(ub, keys)))
+        self.obj.extend(map(float, _per_key(obj, keys)))
+        self.vtype.extend(_per_key(vtype, keys))
+        self.var_names.extend(f'{name}[{_key_str(key)}]' for key in keys)
+        return VarDict((key, Var(self, n0 + pos)) for pos, key in enumerate(keys))
+
+    def getVars(self) -> list[Var]:
+        return [Var(self, i) for i in range(len(self.lb))]
+
+    # constraints
+
+    def _add_row(self, expr: LinExpr, sense: str, name: str) -> Constr:
+        self.row_idx.extend(expr.idx)
+        self.row_coef.extend(expr.coef)
+        self.row_ptr.append(len(self.row_idx))
+        self.sense.append(sense)
+        self.rhs.append(-expr.const)
+        self.constr_names.append(name or f'R{len(self.sense) - 1}')
+        return Constr(self, len(self.sense) - 1)
+
+    def addConstr(self, constr: TempConstr, name: str = '') -> Constr:
+        return self._add_row(constr.expr, constr.sense, name)
+
+    def addLConstr(self, lhs, sense: str, rhs, name: str = '') -> Constr:
+        return self._add_row(quicksum([lhs]) - rhs, sense, name)
+
+    def addConstrs(self, constrs: Iterable[tuple[Any, TempConstr]], name: str = '') -> dict:
+        """Add rows given as pairs of key and constraint (or a dict), the
+        rows are named `name[key]`. Unlike gurobipy, which takes the key from
+        the loop variables of a generator, the key has to be explicit."""
+        if isinstance(constrs, dict):
+            constrs = constrs.items()
+        res = {}
+        for key, constr in constrs:
+            res[key] = self._add_row(constr.expr, constr.sense, f'{name}[{_key_str(key)}]')
+        return res
+
+    def remove(self, constr: Constr):
+        self.removed.add(constr.index)
+
+    def getConstrs(self) -> list[Constr]:
+        return [Constr(self, r) for r in range(len(self.sense)) if r not in self.removed]
+
+    # objective and parameters
+
+    def setObjective(self, expr, sense: int = MINIMIZE):
+        expr = quicksum([expr])
+        self.obj = [0.0] * len(self.lb)
+        for i, c in zip(expr.idx, expr.coef):
+            self.obj[i] += c
+        self.obj_const = expr.const
+        self.ModelSense = sense
+
+    def setParam(self, name: str, value: Any):
+        self.params[name] = value
+
+    def getAttr(self, name: str, objs: Iterable) -> list:
+        return [getattr(obj, name) for obj in objs]
+
+    def setAttr(self, name: str, objs: Iterable, values: Iterable):
+        for obj, value in zip(objs, values):
+            setattr(obj, name, value)
+
+    def update(self):
+        pass
+
+    @property
+    def NumVars(self) -> int:
+        return len(self.lb)
+
+    @property
+    def NumConstrs(self) -> int:
+        return len(self.sense) - len(self.removed)
+
+    @property
+    def NumNZs(self) -> int:
+        ptr = self.row_ptr
+        return len(self.row_idx) - sum(ptr[r + 1] - ptr[r] for r in self.removed)
+
+    @property
+    def IsMIP(self) -> bool:
+        return any(t != CONTINUOUS for t in self.vtype)
+
+    def to_arrays(self) -> 'LinearModel':
+        n_rows = len(self.sense)
+        width = max(len(self.lb), 1)
+        rows = np.repeat(np.arange(n_rows), np.diff(self.row_ptr))
+        keep = np.ones(n_rows, dtype=bool)
+        keep[list(self.removed)] = False
+        entries = keep[rows]
+        # merge repeated variables of a row and drop zeros
+        key, inv = np.unique(
+            (rows * width + np.array(self.row_idx, dtype=np.int64))[entries],
+            return_inverse=True,
+        )
+        coef = np.bincount(inv.ravel(), weights=np.array(self.row_coef, dtype=float)[entries], minlength=len(key))
+        nz = coef != 0
+        key, coef = key[nz], coef[nz]
+        # numbers of the remaining rows
+        new_row = np.cumsum(keep) - 1
+        ptr = np.searchsorted(new_row[key // width], np.arange(keep.sum() + 1))
+        idx = key % width
+        rows = np.flatnonzero(keep)
+        names = [self.constr_names[r] for r in rows]
+        return LinearModel(
+            obj=np.array(self.obj, dtype=float),
+            obj_const=self.obj_const,
+            sense=self.ModelSense,
+            lb=np.array(self.lb, dtype=float),
+            ub=np.array(self.ub, dtype=float),
+            vtype=np.array(self.vtype, dtype='U1'),
+            indptr=ptr,
+            indices=idx,
+            data=coef,
+            row_sense=np.array(self.sense, dtype='U1')[rows],
+            rhs=np.array(self.rhs, dtype=float)[rows],
+            var_names=list(self.var_names),
+            constr_names=list(names),
+        )
+
+    def relax(self) -> 'Model':
+        relaxed = Model(self.ModelName)
+        for name in ('ModelSense', 'lb', 'ub', 'obj', 'obj_const', 'var_names',
+                     'row_ptr', 'row_idx', 'row_coef', 'sense', 'rhs', 'constr_names',
+                     'removed', 'params'):
+            value = getattr(self, name)
+            setattr(relaxed, name, value.copy() if hasattr(value, 'copy') else value)
+        relaxed.vtype = [CONTINUOUS] * len(self.vtype)
+        # binaries keep their bounds
+        relaxed.lb = [max(lb, 0.0) if t == BINARY else lb for lb, t in zip(self.lb, self.vtype)]
+        relaxed.ub = [min(ub, 1.0) if t == BINARY else ub for ub, t in zip(self.ub, self.vtype)]
+        return relaxed
+
+    def optimize(self):
+        solve_highs(self)
+
+    def write(self, path: str):
+        assert path.endswith('.mps'), 'only MPS files are supported'
+        write_mps(self, path)
+
+
+@dataclasses.dataclass
+class LinearModel:
+    """Arrays of a model, with the rows in compressed sparse row format."""
+    obj: np.ndarray
+    obj_const: float
+    sense: int
+    lb: np.ndarray
+    ub: np.ndarray
+    vtype: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    row_sense: np.ndarray
+    rhs: np.ndarray
+    var_names: list[str]
+    constr_names: list[str]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.rhs), len(self.obj)
+
+    def matrix(self):
+        import scipy.sparse as sp
+        return sp.csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+
+def _convert(value, gvars: list, gp):
+    if isinstance(value, VarDict):
+        return gp.tupledict((key, gvars[v.index]) for key, v in value.items())
+    if isinstance(value, Var):
+        return gvars[value.index]
+    if isinstance(value, LinExpr):
+        return gp.LinExpr(value.coef, [gvars[i] for i in value.idx]) + value.const
+    if type(value) is dict:
+        return {key: _convert(v, gvars, gp) for key, v in value.items()}
+    return value
+
+
+def to_gurobi(model: Model):
+    """Gurobi model of the same variables, rows, parameters, start and
+    variable attributes."""
+    import gurobipy as gp
+    lm = model.to_arrays()
+    m = gp.Model(model.ModelName)
+    for name, value in model.params.items():
+        m.setParam(name, value)
+    x = m.addMVar(len(lm.obj), lb=lm.lb, ub=lm.ub, obj=lm.obj, vtype=lm.vtype)
+    if len(lm.rhs) > 0:
+        m.addMConstr(lm.matrix(), x, lm.row_sense, lm.rhs)
+    m.ModelSense = lm.sense
+    m.ObjCon = lm.obj_const
+    m.update()
+    gvars = m.getVars()
+    m.setAttr('VarName', gvars, lm.var_names)
+    m.setAttr('ConstrName', m.getConstrs(), lm.constr_names)
+    if len(model.start) > 0:
+        m.setAttr('Start', [gvars[i] for i in model.start], list(model.start.values()))
+    for name, values in model.attrs.items():
+        if len(values) > 0:
+            m.setAttr(name, [gvars[i] for i in values], list(values.values()))
+    for name, value in vars(model).items():
+        if name.startswith('_'):
+            setattr(m, name, _convert(value, gvars, gp))
+    return m
+
+
+# scipy.optimize.milp status -> Status
+_HIGHS_STATUS = {
+    0: Status.OPTIMAL,
+    1: Status.TIME_LIMIT,
+    2: Status.INFEASIBLE,
+    3: Status.UNBOUNDED,
+    4: Status.NUMERIC,
+}
+
+
+def solve_highs(model: Model):
+    """Solve the model with HiGHS through `scipy.optimize.milp`.
+
+    The parameters TimeLimit, MIPGap, NodeLimit, OutputFlag and Presolve
+    are passed on, the others are ignored. The results are stored in the
+    attributes Status, SolCount, ObjVal, ObjBound, Runtime and NodeCount
+    and the solution is read through `Var.X`.
+    """
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    lm = model.to_arrays()
+    params = model.params
+    options = dict(disp=bool(params.get('OutputFlag', 1)))
+    if 'TimeLimit' in params:
+        options['time_limit'] = float(params['TimeLimit'])
+    if 'MIPGap' in params:
+        options['mip_rel_gap'] = float(params['MIPGap'])
+    if 'NodeLimit' in params and params['NodeLimit'] < INFINITY:
+        options['node_limit'] = int(params['NodeLimit'])
+    if 'Presolve' in params:
+        options['presolve'] = params['Presolve'] != 0
+
+    def inf(a):
+        return np.where(a >= INFINITY, np.inf, np.where(a <= -INFINITY, -np.inf, a))
+
+    lb, ub = inf(lm.lb), inf(lm.ub)
+    binary = lm.vtype == BINARY
+    lb[binary] = np.maximum(lb[binary], 0.0)
+    ub[binary] = np.minimum(ub[binary], 1.0)
+    constraints = []
+    if len(lm.rhs) > 0:
+        rhs = inf(lm.rhs)
+        lo = np.where(lm.row_sense == LESS_EQUAL, -np.inf, rhs)
+        hi = np.where(lm.row_sense == GREATER_EQUAL, np.inf, rhs)
+        constraints.append(LinearConstraint(lm.matrix(), lo, hi))
+
+    t0 = time.time()
+    res = milp(
+        lm.sense * lm.obj,
+        integrality=(lm.vtype != CONTINUOUS).astype(int),
+        bounds=Bounds(lb, ub),
+        constraints=constraints,
+        options=options,
+    )
+    model.Runtime = time.time() - t0
+    model.Status = _HIGHS_STATUS.get(res.status, Status.NUMERIC)
+    model.solution = res.x
+    model.SolCount = 0 if res.x is None else 1
+    model.ObjVal = lm.sense * res.fun + lm.obj_const if res.x is not None else math.nan
+    bound = getattr(res, 'mip_dual_bound', None)
+    if bound is None or not model.IsMIP:
+        bound = res.fun if model.Status == Status.OPTIMAL else -np.inf
+    model.ObjBound = lm.sense * bound + lm.obj_const
+    model.NodeCount = getattr(res, 'mip_node_count', 0) or 0
+
+
+def _mps_number(a: float) -> str:
+    return repr(float(a))
+
+
+def write_mps(model: Model, path: str):
+    """Write the model in free MPS format."""
+    lm = model.to_arrays()
+    n_rows, n_cols = lm.shape
+    lines = [f'NAME {model.ModelName or "tbpp"}']
+    if lm.sense == MAXIMIZE:
+        lines += ['OBJSENSE', '    MAX']
+    lines += ['ROWS', ' N  OBJ']
+    kind = {LESS_EQUAL: 'L', GREATER_EQUAL: 'G', EQUAL: 'E'}
+    lines += [f' {kind[s]}  {name}' for s, name in zip(lm.row_sense, lm.constr_names)]
+
+    # entries by column
+    rows = np.repeat(np.arange(n_rows), np.diff(lm.indptr))
+    order = np.lexsort((rows, lm.indices))
+    cols, rows, data = lm.indices[order], rows[order], lm.data[order]
+    col_ptr = np.searchsorted(cols, np.arange(n_cols + 1))
+
+    lines.append('COLUMNS')
+    integer = False
+    for j in range(n_cols):
+        is_int = lm.vtype[j] != CONTINUOUS
+        if is_int != integer:
+            marker = 'INTORG' if is_int else 'INTEND'
+            lines.append(f"    MARKER 'MARKER' '{marker}'")
+            integer = is_int
+        name = lm.var_names[j]
+        if lm.obj[j] != 0:
+            lines.append(f'    {name} OBJ {_mps_number(lm.obj[j])}')
+        for r, a in zip(rows[col_ptr[j]:col_ptr[j + 1]], data[col_ptr[j]:col_ptr[j + 1]]):
+            lines.append(f'    {name} {lm.constr_names[r]} {_mps_number(a)}')
+        if lm.obj[j] == 0 and col_ptr[j] == col_ptr[j + 1]:
+            lines.append(f'    {name} OBJ 0.0')
+    if integer:
+        lines.append("    MARKER 'MARKER' 'INTEND'")
+
+    lines.append('RHS')
+    if lm.obj_const != 0:
+        lines.append(f'    RHS OBJ {_mps_number(-lm.obj_const)}')
+    lines += [
+        f'    RHS {name} {_mps_number(b)}'
+        for name, b in zip(lm.constr_names, lm.rhs) if b != 0
+    ]
+
+    lines.append('BOUNDS')
+    for j in range(n_cols):
+        name = lm.var_names[j]
+        lb, ub = lm.lb[j], lm.ub[j]
+        if lm.vtype[j] == BINARY:
+            lb, ub = max(lb, 0.0), min(ub, 1.0)
+        if lb == ub:
+            lines.append(f' FX BND {name} {_mps_number(lb)}')
+            continue
+        if lb <= -INFINITY:
+            lines.append(f' MI BND {name}')
+        elif lb != 0:
+            lines.append(f' LO BND {name} {_mps_number(lb)}')
+        if ub < INFINITY:
+            lines.append(f' UP BND {name} {_mps_number(ub)}')
+        elif lm.vtype[j] != CONTINUOUS:
+            # some readers bound integer columns by one otherwise
+            lines.append(f' PL BND {name}')
+    lines.append('ENDATA')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+BACKENDS = {
+    'gurobi': to_gurobi,
+    # the model itself, solved with HiGHS
+    'highs': lambda model: model,
+}
+
+
+def export(model: Model, backend: str):
+    return BACKENDS[backend](model)
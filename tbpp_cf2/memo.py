@@ -0,0 +1,215 @@
+import copy
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+from importlib import import_module
+from collections.abc import Collection
+from types import ModuleType
+from typing import Any, Callable, Optional
+import numpy as np
+from . import instance
+from .instance import InstanceTBPP
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__all__ = ['instance_hash', 'code_hash', 'ResultCache']
+
+
+def instance_hash(inst: InstanceTBPP) -> str:
+    h = hashlib.sha256()
+    for values in (inst.s, inst.e, inst.c):
+        arr = np.asarray(values, dtype=np.int64)
+        h.update(len(arr).to_bytes(8, 'little'))
+        h.update(arr.tobytes())
+    h.update(repr(int(inst.cap)).encode())
+    gamma = getattr(inst, 'gamma', None)
+    if gamma is not None:
+        h.update(repr(float(gamma)).encode())
+    return h.hexdigest()
+
+
+_code_hashes = dict[str, str]()
+
+
+def _source_files(module: ModuleType) -> list[str]:
+    if not hasattr(module, '__path__'):
+        return [inspect.getsourcefile(module)]
+    # a package, all modules of it and its subpackages
+    files = []
+    for path in module.__path__:
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+            files.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith('.py'))
+    return files
+
+
+def code_hash(*modules: ModuleType) -> str:
+    """Hash of the source of modules or whole packages, such that results
+    computed by an older version of the code are not reused. The result
+    of a function depends on every module it calls, so all of them have
+    to be given."""
+    name = ','.join(module.__name__ for module in modules)
+    if name not in _code_hashes:
+        h = hashlib.sha256()
+        for module in modules:
+            root = os.path.dirname(inspect.getsourcefile(module))
+            for path in _source_files(module):
+                h.update(os.path.relpath(path, root).encode())
+                with open(path, 'rb') as f:
+                    h.update(hashlib.sha256(f.read()).digest())
+        _code_hashes[name] = h.hexdigest()
+    return _code_hashes[name]
+
+
+class ResultCache:
+    """Persistent cache of results keyed on the instance and parameters.
+
+    Every entry is a pickle file named by the hash of its key. Entries are
+    written to a temporary file and renamed, so concurrent readers never see
+    partial entries and concurrent writers of the same key are harmless.
+    Reading an entry updates its modification time; whenever the total size
+    exceeds `max_bytes`, the least recently used entries are removed.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 30):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+        # estimate of the total size, refreshed from time to time since
+        # other processes write to the same directory
+        self._total = None
+        self._puts = 0
+
+    def key(self, name: str, inst: InstanceTBPP, params: Optional[dict] = None, code: Collection[ModuleType] = ()) -> str:
+        data = dict(
+            name=name,
+            inst=instance_hash(inst),
+            params=params or {},
+            code=code_hash(*code) if len(code) > 0 else None,
+        )
+        raw = json.dumps(data, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(raw).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + '.pkl')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        f = self._file(key)
+        try:
+            with open(f, 'rb') as fh:
+                value = pickle.load(fh)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return default
+        try:
+            os.utime(f)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any):
+        f = self._file(key)
+        os.makedirs(os.path.dirname(f), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(f), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                pickle.dump(value, fh)
+            os.replace(tmp, f)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._puts += 1
+        if self._total is None or self._puts % 256 == 0:
+            self._total = sum(size for _, size, _ in self._entries())
+        else:
+            self._total += os.path.getsize(f)
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def memoize(self, name: str, inst: InstanceTBPP, params: Optional[dict], compute: Callable[[], Any], code: Collection[ModuleType] = ()) -> Any:
+        key = self.key(name, inst, params, code)
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _entries(self):
+        for sub in os.scandir(self.path):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if not entry.name.endswith('.pkl'):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield st.st_mtime_ns, st.st_size, entry.path
+
+    def evict(self):
+        entries = list(self._entries())
+        total = sum(size for _, size, _ in entries)
+        self._total = total
+        if total <= self.max_bytes:
+            return
+        lock = os.open(os.path.join(self.path, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # oldest first
+            for _, size, f in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(f)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._total = total
+        finally:
+            os.close(lock)
+
+    def lift(self, inst: InstanceTBPP) -> InstanceTBPP:
+        from . import lifting
+        c = self.memoize(
+            'lift', inst, None,
+            lambda: [int(ci) for ci in lifting.lift(inst).c],
+            code=(lifting, instance),
+        )
+        lifted_inst = copy.copy(inst)
+        lifted_inst.c = c
+        return lifted_inst
+
+    def best_look_ahead(self, inst: InstanceTBPP, futures: Collection[int]) -> list[frozenset[int]]:
+        # the package exports the function of the same name
+        heuristic = import_module('.heuristic', __package__)
+        look_ahead = import_module('.heuristic.look_ahead', __package__)
+        alloc = self.memoize(
+            'best_look_ahead', inst, dict(futures=sorted(futures)),
+            lambda: [sorted(pat) for pat in look_ahead.best_look_ahead(inst, futures)],
+            code=(heuristic, instance),
+        )
+        return [frozenset(pat) for pat in alloc]
+
+    def solve(
+        self, model_name: str, inst: InstanceTBPP, params: dict, solve: Callable[[], dict],
+        code: Collection[ModuleType] = (),
+    ) -> dict:
+        """Cached result of `solve`, which should return the allocation, the
+        objective value and the bound. The key includes the source of the
+        module of the model and of the modules that all models use (model
+        representation, conflicts, starts and hints, build statistics and
+        the MIP start), so a change of one model only invalidates its own
+        results. `code` adds the modules of `solve` itself."""
+        modules = [
+            import_module(f'.{name}', __package__)
+            for name in (model_name, 'ir', 'util', 'solve', 'stats', 'instance', 'heuristic')
+        ]
+        return self.memoize(f'solve_{model_name}', inst, params, solve, code=(*modules, *code))
@@ -1,13 +1,19 @@
+from bisect import bisect_left
+from collections import Counter
 from itertools import chain
-from typing import Collection
-import gurobipy as gp
-from . import InstanceTBPPFU
-from .util import pairwise, compute_conflict_cliques
+from typing import TYPE_CHECKING, Collection, Optional, Union
+from . import InstanceTBPPFU, ir, util
+from .util import pairwise, compute_conflict_cliques, group_identical
+from .stats import BuildStats, new_stats
+from .solve import set_hints, set_priority
 
-__all__ = ['build', 'set_start']
+if TYPE_CHECKING:
+    import gurobipy as gp
 
+__all__ = ['build', 'set_start', 'get_allocation']
 
-def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset[int]]):
+
+def set_start(model: Union['gp.Model', ir.Model], inst: InstanceTBPPFU, alloc: Collection[frozenset[int]]):
     model.update()
     # sort by first job
     alloc = sorted(alloc, key=lambda pat: min(pat))
@@ -17,8 +23,10 @@ def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset
     z = model._vars['z']
     w = model._vars['w']
 
-    for i, k in x:
-        x[i, k].Start = 0
+    group_of = {i: g for g, grp in enumerate(model._groups) for i in grp}
+
+    for g, k in x:
+        x[g, k].Start = 0
 
     ys = {}
     for t, k in y:
@@ -34,8 +42,8 @@ def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset
         z[k].Start = 0
 
     for k, pat in enumerate(alloc):
-        for i in pat:
-            x[i, k].Start = 1
+        for g, cnt in Counter(group_of[i] for i in pat).items():
+            x[g, k].Start = cnt
         z[k].Start = 1
 
     for t, k in w:
@@ -56,13 +64,23 @@ def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset
             w[t, k].Start = 0 if ys[tp, k] == 1 else ys[t, k]
 
 
+def get_allocation(model: Union['gp.Model', ir.Model], values: Optional[dict] = None) -> list[frozenset[int]]:
+    return util.get_allocation(model, values, model._groups)
+
+
 def build(
     inst: InstanceTBPPFU,
     lb_servers: int = 0, ub_servers: int = 0,
     mods: set[str] = {'conflicts'},
+    stats: Optional[BuildStats] = None,
+    backend: str = 'gurobi',
+    priority: int = 0,
+    hints: Union[None, str, Collection[frozenset[int]]] = None,
 ):
 
-    assert mods <= {'conflicts', 'wy', 'continuous_w'}
+    assert mods <= {'conflicts', 'wy', 'continuous_w', 'aggregate'}
+    stats = new_stats() if stats is None else stats
+    stats.start()
 
     # idx set of items (jobs)
     idx_i = range(inst.n)
@@ -90,22 +108,39 @@ def build(
     } for k in idx_k}
     t_k = {k: sorted(ts_k[k] | te_k[k]) for k in idx_k}
 
-    m = gp.Model()
+    # identical jobs share one integer variable per server
+    groups = group_identical(inst) if 'aggregate' in mods else [[i] for i in idx_i]
+    idx_g = range(len(groups))
+    s_g = [inst.s[grp[0]] for grp in groups]
+    e_g = [inst.e[grp[0]] for grp in groups]
+    c_g = [inst.c[grp[0]] for grp in groups]
+    last_g = [grp[-1] for grp in groups]
+    # jobs of group g that fit on server k
+    u = {
+        (g, k): int(min(len(grp) - bisect_left(grp, k), inst.cap // c_g[g]))
+        for g, grp in enumerate(groups)
+        for k in idx_k if last_g[g] >= k
+    }
+    stats.lap('index')
+
+    m = ir.Model()
 
     # add variables
     x = m.addVars(
-        [(i, k) for i in idx_i for k in idx_k if i >= k],
-        vtype=gp.GRB.BINARY, name='x'
+        list(u),
+        ub=u,
+        vtype={gk: ir.BINARY if ub <= 1 else ir.INTEGER for gk, ub in u.items()},
+        name='x'
     )
     z = m.addVars(
         idx_k,
-        obj=1, vtype=gp.GRB.BINARY, name='z'
+        obj=1, vtype=ir.BINARY, name='z'
     )
     y = m.addVars(
         ((t, k) for k in idx_k for t in t_k[k]),
-        lb=0.0, ub=1.0, vtype=gp.GRB.BINARY, name='y'
+        lb=0.0, ub=1.0, vtype=ir.BINARY, name='y'
     )
-    w_type = gp.GRB.CONTINUOUS if 'continuous_w' in mods else gp.GRB.BINARY
+    w_type = ir.CONTINUOUS if 'continuous_w' in mods else ir.BINARY
     w = m.addVars(
         ((t, k) for k in idx_k for t in ts_k[k]),
         obj=inst.gamma,
@@ -116,94 +151,148 @@ def build(
     m._fireups = w.sum()
     m._vars = dict(x=x, y=y, z=z, w=w)
     m._times = dict(t_k=t_k, ts_k=ts_k, te_k=te_k)
-    m._set_start = lambda alloc: set_start(m, inst, alloc)
+    m._groups = groups
+    m._stats = stats
+    stats.lap('vars', m)
+
+    # groups that fit on server k, with one group per job the jobs from k
+    if 'aggregate' in mods:
+        g_k = {k: [g for g in idx_g if last_g[g] >= k] for k in idx_k}
+    else:
+        g_k = {k: idx_g[k:] for k in idx_k}
 
     # capacity constraint and activity of server
     m.addConstrs((
-        gp.quicksum(
-            inst.c[i] * x[i, k]
-            for i in idx_i if i >= k and inst.s[i] <= t and t < inst.e[i]
-        ) <= inst.cap * y[t, k]
+        ((k, t), ir.quicksum(
+            c_g[g] * x[g, k]
+            for g in g_k[k] if s_g[g] <= t and t < e_g[g]
+        ) <= inst.cap * y[t, k])
         for k in idx_k
         for t in tsnd_k[k]
     ), name='on')
+    stats.lap('on', m)
 
     m.addConstrs((
-        gp.quicksum(
-            x[i, k]
-            for i in idx_i if i >= k and inst.s[i] <= t and t < inst.e[i]
-        ) >= y[t, k]
+        ((k, t), ir.quicksum(
+            x[g, k]
+            for g in g_k[k] if s_g[g] <= t and t < e_g[g]
+        ) >= y[t, k])
         for k in idx_k
         for t in te_k[k]
     ), name='off')
+    stats.lap('off', m)
 
     # exactly one server per job
     m.addConstrs((
-        x.sum(i, '*') == 1
-        for i in idx_i
+        (g, x.sum(g, '*') == len(groups[g]))
+        for g in idx_g
     ), name='assign')
+    stats.lap('assign', m)
+
+    if 'aggregate' in mods:
+        # the servers after job i only take the later jobs of its group
+        m.addConstrs((
+            ((g, r), ir.quicksum(x[g, k] for k in idx_k[groups[g][r] + 1:last_g[g] + 1]) <= len(groups[g]) - 1 - r)
+            for g in idx_g
+            for r in range(len(groups[g]) - 1)
+            if groups[g][r] + 1 < n_servers
+        ), name='order')
+        stats.lap('order', m)
 
     # coupling of x and y
     m.addConstrs((
-        x[i, k] <= y[inst.s[i], k]
+        ((k, g), x[g, k] <= u[g, k] * y[s_g[g], k])
         for k in idx_k
-        for i in idx_i if k <= i
+        for g in g_k[k]
     ), name='act')
+    stats.lap('act', m)
 
     # coupling of y and z
     m.addConstrs((
-        y[t, k] <= z[k]
+        ((k, t), y[t, k] <= z[k])
         for k in idx_k
         for t in tsnd_k[0] & ts_k[k]
     ), name='use_y')
+    stats.lap('use_y', m)
 
     # coupling of y and w
     m.addConstrs((
-        y[t, k] <= w[t, k] + (0.0 if tp == 's' else y[tp, k])
+        ((k, tp, t), y[t, k] <= w[t, k] + (0.0 if tp == 's' else y[tp, k]))
         for k in idx_k
         for tp, t in pairwise(chain(['s'], t_k[k])) if t in ts_k[k]
     ), name='fireup')
+    stats.lap('fireup', m)
 
     if 'wy' in mods:
         m.addConstrs((
-            w[t, k] <= y[t, k]
+            ((k, tp, t), w[t, k] <= y[t, k])
             for k in idx_k
             for tp, t in pairwise(t_k[k]) if t in ts_k[k]
         ), name='wy_on')
         m.addConstrs((
-            w[t, k] <= 1 - y[tp, k]
+            ((k, tp, t), w[t, k] <= 1 - y[tp, k])
             for k in idx_k
             for tp, t in pairwise(t_k[k]) if t in ts_k[k]
         ), name='wy_off')
+        stats.lap('wy', m)
 
     # use bound on server count
     if lb_servers > 0:
         m.addConstrs(
-            (z[k] == 1 for k in range(lb_servers)),
+            ((k, z[k] == 1) for k in range(lb_servers)),
             name='lb_server'
         )
 
     # break symmetry
     m.addConstrs((
-        z[k] >= z[k + 1]
+        (k, z[k] >= z[k + 1])
         for k in idx_k[lb_servers:-1]
     ), name='break_symmetry')
+    stats.lap('symmetry', m)
 
     # add VIs
     m.addConstrs((
-        z[k] <= w.sum('*', k)
+        (k, z[k] <= w.sum('*', k))
         for k in idx_k
     ), name='server_fireup')
+    stats.lap('server_fireup', m)
 
     if 'conflicts' in mods:
         ccs = compute_conflict_cliques(inst, n_servers)
+        stats.lap('cliques')
+        group_of = {i: g for g, grp in enumerate(groups) for i in grp}
         for k, cs_k in enumerate(ccs):
+            seen = set[tuple[int, ...]]()
             for i, cs in cs_k.items():
                 for l, c in enumerate(cs):
+                    gs = tuple(sorted({group_of[j] for j in c}))
+                    # cliques that differ in identical jobs only
+                    if 'aggregate' in mods and gs in seen:
+                        continue
+                    seen.add(gs)
+                    # a clique holds at most one group of small jobs, which
+                    # can share the server with each other but not with the
+                    # large jobs
+                    small = [g for g in gs if 2 * c_g[g] <= inst.cap]
+                    ub = u[small[0], k] if len(small) > 0 else 1
                     sc = max(inst.s[j] for j in c)
                     m.addConstr(
-                        gp.quicksum(x[j, k] for j in c) <= y[sc, k],
+                        ir.quicksum((1 if g in small else ub) * x[g, k] for g in gs) <= ub * y[sc, k],
                         name=f'conflict[{k},{i},{l}]'
                     )
-
-    return m
+        stats.lap('conflict', m)
+
+    model = ir.export(m, backend)
+    model._set_start = lambda alloc: set_start(model, inst, alloc)
+    model._get_allocation = lambda values=None: get_allocation(model, values)
+    stats.lap('export', model)
+
+    # branch on the server variables first
+    if priority != 0:
+        set_priority(model, priority)
+    # hints from an allocation or, for 'lp', the LP relaxation
+    if hints is not None:
+        set_hints(model, hints)
+        stats.lap('hints')
+    stats.finish(model)
+    return model
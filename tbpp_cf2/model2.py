@@ -1,12 +1,18 @@
-from typing import Collection
-import gurobipy as gp
-from . import InstanceTBPPFU
-from .util import pairwise, compute_conflict_cliques
+from bisect import bisect_left
+from collections import Counter
+from typing import TYPE_CHECKING, Collection, Optional, Union
+from . import InstanceTBPPFU, ir, util
+from .util import pairwise, compute_conflict_cliques, group_identical
+from .stats import BuildStats, new_stats
+from .solve import set_hints, set_priority
 
-__all__ = ['build', 'set_start']
+if TYPE_CHECKING:
+    import gurobipy as gp
 
+__all__ = ['build', 'set_start', 'get_allocation']
 
-def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset[int]]):
+
+def set_start(model: Union['gp.Model', ir.Model], inst: InstanceTBPPFU, alloc: Collection[frozenset[int]]):
     model.update()
     # sort by first job
     alloc = sorted(alloc, key=lambda pat: min(pat))
@@ -15,15 +21,17 @@ def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset
     z = model._vars['z']
     w = model._vars['w']
 
-    for i, k in x:
-        x[i, k].Start = 0
+    group_of = {i: g for g, grp in enumerate(model._groups) for i in grp}
+
+    for g, k in x:
+        x[g, k].Start = 0
 
     for k in z:
         z[k].Start = 0
 
     for k, pat in enumerate(alloc):
-        for i in pat:
-            x[i, k].Start = 1
+        for g, cnt in Counter(group_of[i] for i in pat).items():
+            x[g, k].Start = cnt
         z[k].Start = 1
 
     for t, k in w:
@@ -53,13 +61,23 @@ def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset
             ) else 0
 
 
+def get_allocation(model: Union['gp.Model', ir.Model], values: Optional[dict] = None) -> list[frozenset[int]]:
+    return util.get_allocation(model, values, model._groups)
+
+
 def build(
     inst: InstanceTBPPFU,
     lb_servers: int = 0, ub_servers: int = 0,
     mods: set[str] = {'conflicts'},
+    stats: Optional[BuildStats] = None,
+    backend: str = 'gurobi',
+    priority: int = 0,
+    hints: Union[None, str, Collection[frozenset[int]]] = None,
 ):
 
-    assert mods <= {'conflicts'}
+    assert mods <= {'conflicts', 'aggregate'}
+    stats = new_stats() if stats is None else stats
+    stats.start()
 
     # idx set of items (jobs)
     idx_i = range(inst.n)
@@ -78,56 +96,114 @@ def build(
         for k in idx_k
     }
 
-    m = gp.Model()
+    # identical jobs share one integer variable per server
+    groups = group_identical(inst) if 'aggregate' in mods else [[i] for i in idx_i]
+    idx_g = range(len(groups))
+    s_g = [inst.s[grp[0]] for grp in groups]
+    e_g = [inst.e[grp[0]] for grp in groups]
+    c_g = [inst.c[grp[0]] for grp in groups]
+    first_g = [grp[0] for grp in groups]
+    last_g = [grp[-1] for grp in groups]
+    # jobs of group g that fit on server k
+    u = {
+        (g, k): int(min(len(grp) - bisect_left(grp, k), inst.cap // c_g[g]))
+        for g, grp in enumerate(groups)
+        for k in idx_k if k <= last_g[g]
+    }
+    stats.lap('index')
+
+    m = ir.Model()
     # add variables
     x = m.addVars(
-        [(i, k) for i in idx_i for k in idx_k if k <= i],
-        vtype=gp.GRB.BINARY, name='x'
+        list(u),
+        ub=u,
+        vtype={gk: ir.BINARY if ub <= 1 else ir.INTEGER for gk, ub in u.items()},
+        name='x'
     )
     w = m.addVars(
         [(l, k) for k in idx_k for l in ts_k[k]],
-        obj=inst.gamma, vtype=gp.GRB.BINARY, name='w'
+        obj=inst.gamma, vtype=ir.BINARY, name='w'
     )
-    z = m.addVars(idx_k, obj=1, vtype=gp.GRB.BINARY, name='z')
+    z = m.addVars(idx_k, obj=1, vtype=ir.BINARY, name='z')
 
     m._servers = z.sum()
     m._fireups = w.sum()
     m._vars = dict(x=x, z=z, w=w)
     m._times = dict(t_k=t_k, ts_k=ts_k, te_k=te_k)
-    m._set_start = lambda alloc: set_start(m, inst, alloc)
+    m._groups = groups
+    m._stats = stats
+    stats.lap('vars', m)
 
     # exactly one server per job
     m.addConstrs((
-        x.sum(i, '*') == 1
-        for i in idx_i
+        (g, x.sum(g, '*') == len(groups[g]))
+        for g in idx_g
     ), name='assign')
+    stats.lap('assign', m)
 
+    if 'aggregate' in mods:
+        # the servers after job i only take the later jobs of its group
+        m.addConstrs((
+            ((g, r), ir.quicksum(x[g, k] for k in idx_k[groups[g][r] + 1:last_g[g] + 1]) <= len(groups[g]) - 1 - r)
+            for g in idx_g
+            for r in range(len(groups[g]) - 1)
+            if groups[g][r] + 1 < n_servers
+        ), name='order')
+        stats.lap('order', m)
+
+    if 'aggregate' in mods:
+        m.addConstrs((
+            ((k, g), ir.quicksum(
+                c_g[h] * x[h, k]
+                for h in idx_g
+                if k <= last_g[h] and first_g[h] <= last_g[g] and s_g[g] < e_g[h]
+            ) <= inst.cap * z[k])
+            for k in idx_k
+            for g in idx_g
+            if k <= last_g[g] and s_g[g] in tsnd_k[k]
+        ), name='cap')
+    else:
+        # one group per job, only the earlier jobs need to be scanned
+        m.addConstrs((
+            ((k, i), ir.quicksum(
+                inst.c[j] * x[j, k]
+                for j in idx_i[k:i + 1] if inst.s[i] < inst.e[j]
+            ) <= inst.cap * z[k])
+            for k in idx_k
+            for i in idx_i
+            if k <= i and inst.s[i] in tsnd_k[k]
+        ), name='cap')
+    stats.lap('cap', m)
     m.addConstrs((
-        gp.quicksum(
-            inst.c[j] * x[j, k]
-            for j in idx_i[:i+1] if j >= k and inst.s[i] < inst.e[j]
-        ) <= inst.cap * z[k]
-        for k in idx_k
-        for i in idx_i
-        if k <= i and inst.s[i] in tsnd_k[k]
-    ), name='cap')
-    m.addConstrs((
-        x[i, k] <= z[k]
+        ((k, g), x[g, k] <= u[g, k] * z[k])
         for k in idx_k
-        for i in idx_i
-        if k <= i
+        for g in idx_g
+        if k <= last_g[g]
     ), name='use')
-    m.addConstrs((
-        x[i, k] <= w[inst.s[i], k] +
-        gp.quicksum(
-            x[j, k]
-            for j in idx_i[k:i]
-            if inst.e[j] >= inst.s[i]
-        )
-        for k in idx_k
-        for i in idx_i
-        if k <= i
-    ), name='fireup')
+    stats.lap('use', m)
+    if 'aggregate' in mods:
+        m.addConstrs((
+            ((k, g), x[g, k] <= u[g, k] * (w[s_g[g], k] + ir.quicksum(
+                x[h, k]
+                for h in idx_g
+                if k <= last_g[h] and first_g[h] < first_g[g] and e_g[h] >= s_g[g]
+            )))
+            for k in idx_k
+            for g in idx_g
+            if k <= last_g[g]
+        ), name='fireup')
+    else:
+        m.addConstrs((
+            ((k, i), x[i, k] <= w[inst.s[i], k] + ir.quicksum(
+                x[j, k]
+                for j in idx_i[k:i]
+                if inst.e[j] >= inst.s[i]
+            ))
+            for k in idx_k
+            for i in idx_i
+            if k <= i
+        ), name='fireup')
+    stats.lap('fireup', m)
 
     # use bound on server count
     if lb_servers > 0:
@@ -138,24 +214,53 @@ def build(
 
     # break symmetry
     m.addConstrs((
-        z[k] >= z[k+1]
+        (k, z[k] >= z[k+1])
         for k in idx_k[lb_servers:-1]
     ), name='break_symmetry')
+    stats.lap('symmetry', m)
 
     # add VI
     m.addConstrs((
-        z[k] <= w.sum('*', k)
+        (k, z[k] <= w.sum('*', k))
         for k in idx_k
     ), name='server_fireup')
+    stats.lap('server_fireup', m)
 
     if 'conflicts' in mods:
         ccs = compute_conflict_cliques(inst, n_servers)
+        stats.lap('cliques')
+        group_of = {i: g for g, grp in enumerate(groups) for i in grp}
         for k, cs_k in enumerate(ccs):
+            seen = set[tuple[int, ...]]()
             for i, cs in cs_k.items():
                 for l, c in enumerate(cs):
+                    gs = tuple(sorted({group_of[j] for j in c}))
+                    # cliques that differ in identical jobs only
+                    if 'aggregate' in mods and gs in seen:
+                        continue
+                    seen.add(gs)
+                    # a clique holds at most one group of small jobs, which
+                    # can share the server with each other but not with the
+                    # large jobs
+                    small = [g for g in gs if 2 * c_g[g] <= inst.cap]
+                    ub = u[small[0], k] if len(small) > 0 else 1
                     m.addConstr(
-                        gp.quicksum(x[j, k] for j in c) <= z[k],
+                        ir.quicksum((1 if g in small else ub) * x[g, k] for g in gs) <= ub * z[k],
                         name=f'conflict[{k},{i},{l}]'
                     )
+        stats.lap('conflict', m)
+
+    model = ir.export(m, backend)
+    model._set_start = lambda alloc: set_start(model, inst, alloc)
+    model._get_allocation = lambda values=None: get_allocation(model, values)
+    stats.lap('export', model)
 
-    return m
+    # branch on the server variables first
+    if priority != 0:
+        set_priority(model, priority)
+    # hints from an allocation or, for 'lp', the LP relaxation
+    if hints is not None:
+        set_hints(model, hints)
+        stats.lap('hints')
+    stats.finish(model)
+    return model
@@ -1,11 +1,15 @@
-from typing import Collection, Optional
-import gurobipy as gp
-from . import InstanceTBPPFU
+from typing import TYPE_CHECKING, Collection, Optional, Union
+from . import InstanceTBPPFU, ir, util
+from .stats import BuildStats, new_stats
+from .solve import set_hints, set_priority
 
-__all__ = ['build', 'set_start']
+if TYPE_CHECKING:
+    import gurobipy as gp
 
+__all__ = ['build', 'set_start', 'get_allocation']
 
-def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset[int]]):
+
+def set_start(model: Union['gp.Model', ir.Model], inst: InstanceTBPPFU, alloc: Collection[frozenset[int]]):
     model.update()
 
     x = model._vars['x']
@@ -25,11 +29,19 @@ def set_start(model: gp.Model, inst: InstanceTBPPFU, alloc: Collection[frozenset
             ) else 1
 
 
+def get_allocation(model: Union['gp.Model', ir.Model], values: Optional[dict] = None) -> list[frozenset[int]]:
+    return util.get_allocation(model, values)
+
+
 def build(
     inst: InstanceTBPPFU,
     lb_servers: int = 0,
     ub_servers: Optional[int] = None,
     mods={'vi1', 'vi2', 'dominance'},
+    stats: Optional[BuildStats] = None,
+    backend: str = 'gurobi',
+    priority: int = 0,
+    hints: Union[None, str, Collection[frozenset[int]]] = None,
 ):
 
     assert set(mods) <= {
@@ -38,8 +50,11 @@ def build(
         'continuous_w'
     }
 
+    stats = new_stats() if stats is None else stats
+    stats.start()
+
     idx_i = range(inst.n)
-    m = gp.Model()
+    m = ir.Model()
 
     # add variables
     x = m.addVars(
@@ -53,39 +68,41 @@ def build(
                 inst.c[i] + inst.c[k] <= inst.cap
             )
         ],
-        vtype=gp.GRB.BINARY,
+        vtype=ir.BINARY,
         name='x'
     )
     w = m.addVars(
         idx_i,
-        vtype=gp.GRB.CONTINUOUS if 'continuous_w' in mods else gp.GRB.BINARY,
+        vtype=ir.CONTINUOUS if 'continuous_w' in mods else ir.BINARY,
         name='w'
     )
 
     m._vars = dict(x=x, w=w)
-    m._set_start = lambda alloc: set_start(m, inst, alloc)
 
-    servers = gp.quicksum(x[i, i] for i in idx_i)
+    servers = ir.quicksum(x[i, i] for i in idx_i)
     fireups = w.sum()
-    m.setObjective(servers + inst.gamma * fireups, gp.GRB.MINIMIZE)
+    m.setObjective(servers + inst.gamma * fireups, ir.MINIMIZE)
     m._servers = servers
     m._fireups = fireups
+    m._stats = stats
+    stats.lap('vars', m)
 
     # exactly one server per job
     m.addConstrs((
-        x.sum(i, '*') == 1
+        (i, x.sum(i, '*') == 1)
         for i in idx_i
     ), name='assign')
+    stats.lap('assign', m)
 
     # capacity constraints
     use_dominance = 'dominance' in mods
 
     m.addConstrs((
-        gp.quicksum(
+        ((i, k), ir.quicksum(
             inst.c[j] * x[j, k]
             for j in idx_i[:i + 1]
             if (j, k) in x and inst.e[j] > inst.s[i]
-        ) <= inst.cap * x[k, k]
+        ) <= inst.cap * x[k, k])
         for (i, k) in x
         if k != i and (
             not use_dominance or
@@ -95,16 +112,18 @@ def build(
             )
         )
     ), name='cap')
+    stats.lap('cap', m)
 
     # fireup constraints
     m.addConstrs((
-        x[i, k] <= w[i] + gp.quicksum(
+        ((i, k), x[i, k] <= w[i] + ir.quicksum(
             x[j, k]
             for j in idx_i[:i]
             if (j, k) in x and inst.e[j] >= inst.s[i]
-        )
+        ))
         for (i, k) in x
     ), name='fireup')
+    stats.lap('fireup', m)
 
     # use bound on server count
     if lb_servers > 0:
@@ -112,19 +131,36 @@ def build(
             sum(x[k, k] for k in idx_i) >= lb_servers,
             name='lb_server'
         )
+        # the same phase as the bound and symmetry rows of model1 and model2
+        stats.lap('symmetry', m)
 
     if 'vi1' in mods:
         # add VI
         m.addConstrs((
-            x[k, k] <= w[k]
+            (k, x[k, k] <= w[k])
             for k in idx_i
         ), name='use_fireup')
+        stats.lap('vi1', m)
 
     if 'vi2' in mods:
         m.addConstrs((
-            x[i, k] <= x[k, k]
+            ((i, k), x[i, k] <= x[k, k])
             for (i, k) in x
             if k != i
         ), name='assign_use')
-
-    return m
+        stats.lap('vi2', m)
+
+    model = ir.export(m, backend)
+    model._set_start = lambda alloc: set_start(model, inst, alloc)
+    model._get_allocation = lambda values=None: get_allocation(model, values)
+    stats.lap('export', model)
+
+    # branch on the server variables first
+    if priority != 0:
+        set_priority(model, priority)
+    # hints from an allocation or, for 'lp', the LP relaxation
+    if hints is not None:
+        set_hints(model, hints)
+        stats.lap('hints')
+    stats.finish(model)
+    return model
@@ -0,0 +1,462 @@
+import dataclasses
+import inspect
+import json
+import math
+from collections import defaultdict
+from collections.abc import Callable, Collection, Iterable
+from importlib import import_module
+from typing import Optional
+import numpy as np
+from .instance import InstanceTBPP
+from .util import group_identical
+
+__all__ = [
+    'Size', 'MODS', 'default_mods', 'config_key', 'parse_key',
+    'family_sizes', 'estimate_size', 'features', 'REGRESSORS',
+    'Prediction', 'Selector', 'calibrate',
+]
+
+# modifiers accepted by the builders
+MODS = dict(
+    model1=frozenset({'conflicts', 'wy', 'continuous_w', 'aggregate'}),
+    model2=frozenset({'conflicts', 'aggregate'}),
+    model3=frozenset({'vi1', 'vi2', 'dominance', 'continuous_w'}),
+)
+# constraint families that are only built with a modifier
+FAMILY_MODS = dict(conflict='conflicts', wy='wy', order='aggregate', vi1='vi1', vi2='vi2')
+# modifiers that change the other families instead of adding one
+STRUCTURAL_MODS = frozenset({'aggregate', 'dominance'})
+
+REGRESSORS = ('const', 'log_nnz', 'log_nvar', 'log_ncon', 'log_overlap', 'load', 'large', 'duplicates')
+
+
+@dataclasses.dataclass
+class Size:
+    nvar: int = 0
+    ncon: int = 0
+    nnz: int = 0
+
+    def __add__(self, other: 'Size') -> 'Size':
+        return Size(self.nvar + other.nvar, self.ncon + other.ncon, self.nnz + other.nnz)
+
+
+def default_mods(model_name: str) -> frozenset[str]:
+    build = import_module(f'.{model_name}', __package__).build
+    return frozenset(inspect.signature(build).parameters['mods'].default)
+
+
+def config_key(model_name: str, mods: Collection[str]) -> str:
+    return '+'.join([model_name] + sorted(mods))
+
+
+def parse_key(key: str) -> tuple[str, frozenset[str]]:
+    model_name, *mods = key.split('+')
+    return model_name, frozenset(mods)
+
+
+def _nd_starts(ts: np.ndarray, te: np.ndarray) -> np.ndarray:
+    # start times followed by an end time, the time points of compute_cliques
+    pts = np.union1d(ts, te)
+    nxt = np.searchsorted(pts, ts) + 1
+    has_nxt = nxt < len(pts)
+    return ts[has_nxt][np.isin(pts[nxt[has_nxt]], te)]
+
+
+def _active(ss: np.ndarray, es: np.ndarray, t: np.ndarray) -> np.ndarray:
+    # number of intervals with s <= t < e, for sorted starts and ends
+    return np.searchsorted(ss, t, 'right') - np.searchsorted(es, t, 'right')
+
+
+@dataclasses.dataclass
+class _Units:
+    # jobs, or groups of identical jobs with the 'aggregate' mod
+    groups: list[list[int]]
+    s: np.ndarray
+    e: np.ndarray
+    c: np.ndarray
+    first: np.ndarray
+    last: np.ndarray
+
+    @classmethod
+    def of(cls, inst: InstanceTBPP, aggregate: bool) -> '_Units':
+        groups = group_identical(inst) if aggregate else [[i] for i in range(inst.n)]
+        first = np.array([grp[0] for grp in groups], dtype=int)
+        return cls(
+            groups,
+            np.asarray(inst.s)[first], np.asarray(inst.e)[first], np.asarray(inst.c)[first],
+            first, np.array([grp[-1] for grp in groups], dtype=int),
+        )
+
+
+def _servers(inst: InstanceTBPP, units: _Units, n_servers: int):
+    """Time points of every server as in model1 and model2, the start times
+    of jobs k, k + 1, ..., their end times and the start times followed by
+    an end time, and the units that may use the server with their sorted
+    end times."""
+    s = np.asarray(inst.s)
+    e = np.asarray(inst.e)
+    su = np.unique(s)
+    es = np.sort(e)
+    for k in range(n_servers):
+        if k > 0:
+            es = np.delete(es, np.searchsorted(es, e[k - 1]))
+        ts = su[np.searchsorted(su, s[k]):]
+        te = np.unique(es)
+        alive = units.last >= k
+        yield ts, te, _nd_starts(ts, te), alive, np.sort(units.e[alive])
+
+
+def _nondominated(b: np.ndarray) -> np.ndarray:
+    # remove_small_or_dominated on the rows of a membership matrix
+    keep = b.sum(axis=1) > 1
+    sub = ~(b[1:] & ~b[:-1]).any(axis=1)
+    keep[1:] &= ~sub
+    sub = ~(b[:-1] & ~b[1:]).any(axis=1)
+    keep[:-1] &= ~sub
+    return b[keep]
+
+
+def _clique_size(b: np.ndarray, idx: np.ndarray, n_servers: int) -> Size:
+    # a clique is repeated for server k while it has two members whose
+    # index is at least k, every row also holds the activity variable
+    if b.shape[0] == 0 or b.shape[1] == 0:
+        return Size()
+    order = np.argsort(idx, kind='stable')
+    b = b[:, order]
+    idx = idx[order]
+    rev = np.cumsum(b[:, ::-1], axis=1)[:, ::-1]
+    kmax = np.minimum(idx[(rev >= 2).sum(axis=1) - 1], n_servers - 1)
+    rows = int((kmax + 1).sum())
+    nnz = int((b * (np.minimum(idx[None, :], kmax[:, None]) + 1)).sum()) + rows
+    return Size(0, rows, nnz)
+
+
+def _conflicts(inst: InstanceTBPP, units: _Units, n_servers: int) -> Size:
+    """Estimated size of the conflict constraints.
+
+    The cliques of the first server are counted exactly (per unit instead
+    of per job with the 'aggregate' mod), for the other servers cliques are
+    only dropped once they have less than two members left, without
+    checking dominance again.
+    """
+    cap = inst.cap
+    t = _nd_starts(np.unique(inst.s), np.unique(inst.e))
+    # unit j belongs to the cliques a[j] <= r < b[j]
+    a = np.searchsorted(t, units.s, 'left')
+    b = np.searchsorted(t, units.e, 'left')
+
+    def count(rows: np.ndarray, cols: np.ndarray) -> Size:
+        member = (a[cols] <= rows[:, None]) & (rows[:, None] < b[cols])
+        return _clique_size(_nondominated(member), units.last[cols], n_servers)
+
+    size = count(np.arange(len(t)), np.flatnonzero(2 * units.c > cap))
+    idx = np.arange(len(units.c))
+    for g in np.flatnonzero(2 * units.c <= cap):
+        cols = np.flatnonzero(
+            ((units.c > cap - units.c[g]) & (a < b[g]) & (b > a[g])) | (idx == g)
+        )
+        size += count(np.arange(a[g], b[g]), cols)
+    return size
+
+
+def _symmetry(lb_servers: int, n_servers: int) -> Size:
+    ncon = max(0, n_servers - 1 - lb_servers)
+    return Size(0, ncon, 2 * ncon)
+
+
+def _order(groups: list[list[int]], n_servers: int) -> Size:
+    size = Size()
+    for grp in groups:
+        for r in range(len(grp) - 1):
+            if grp[r] + 1 < n_servers:
+                size += Size(0, 1, min(grp[-1], n_servers - 1) - grp[r])
+    return size
+
+
+def _model1(inst: InstanceTBPP, units: _Units, lb_servers: int, n_servers: int, mods: Collection[str]) -> dict[str, Size]:
+    sizes = defaultdict(Size)
+    last_ts = inst.s[-1]
+    tsnd_0 = None
+    for ts, te, tsnd, alive, es_u in _servers(inst, units, n_servers):
+        tsnd_0 = tsnd if tsnd_0 is None else tsnd_0
+        ss_u = units.s[alive]
+        ng = len(ss_u)
+        nts = len(ts)
+        te = te[te < last_ts]
+        # x, z, y and w
+        sizes['vars'] += Size(ng + 1 + len(np.union1d(ts, te)) + nts)
+        sizes['on'] += Size(0, len(tsnd), int(_active(ss_u, es_u, tsnd).sum()) + len(tsnd))
+        sizes['off'] += Size(0, len(te), int(_active(ss_u, es_u, te).sum()) + len(te))
+        sizes['assign'] += Size(0, 0, ng)
+        sizes['act'] += Size(0, ng, 2 * ng)
+        nuse = len(np.intersect1d(tsnd_0, ts, assume_unique=True))
+        sizes['use_y'] += Size(0, nuse, 2 * nuse)
+        # the first time point is a start without a predecessor
+        sizes['fireup'] += Size(0, nts, 3 * nts - 1)
+        sizes['wy'] += Size(0, 2 * (nts - 1), 4 * (nts - 1))
+        sizes['server_fireup'] += Size(0, 1, 1 + nts)
+    sizes['assign'] += Size(0, len(units.groups), 0)
+    sizes['symmetry'] = _symmetry(lb_servers, n_servers) + Size(0, lb_servers, lb_servers)
+    if 'aggregate' in mods:
+        sizes['order'] = _order(units.groups, n_servers)
+    if 'conflicts' in mods:
+        sizes['conflict'] = _conflicts(inst, units, n_servers)
+    return dict(sizes)
+
+
+def _model2(inst: InstanceTBPP, units: _Units, lb_servers: int, n_servers: int, mods: Collection[str]) -> dict[str, Size]:
+    sizes = defaultdict(Size)
+    for ts, te, tsnd, alive, es_u in _servers(inst, units, n_servers):
+        ss_u = units.s[alive]
+        fs = units.first[alive]
+        ng = len(ss_u)
+        # x, w and z
+        sizes['vars'] += Size(ng + len(ts) + 1)
+        sizes['assign'] += Size(0, 0, ng)
+        # units h with first_h <= last_g and e_h > s_g, those ending before
+        # s_g come first anyway
+        rows = np.isin(ss_u, tsnd)
+        cnt = np.searchsorted(fs, units.last[alive][rows], 'right') - np.searchsorted(es_u, ss_u[rows], 'right')
+        sizes['cap'] += Size(0, int(rows.sum()), int(cnt.sum() + rows.sum()))
+        sizes['use'] += Size(0, ng, 2 * ng)
+        # units h with first_h < first_g and e_h >= s_g
+        cnt = np.arange(ng) - np.searchsorted(es_u, ss_u, 'left')
+        sizes['fireup'] += Size(0, ng, int(cnt.sum()) + 2 * ng)
+        sizes['server_fireup'] += Size(0, 1, 1 + len(ts))
+    sizes['assign'] += Size(0, len(units.groups), 0)
+    sizes['symmetry'] = _symmetry(lb_servers, n_servers)
+    if lb_servers > 0:
+        sizes['symmetry'] += Size(0, 1, lb_servers)
+    if 'aggregate' in mods:
+        sizes['order'] = _order(units.groups, n_servers)
+    if 'conflicts' in mods:
+        sizes['conflict'] = _conflicts(inst, units, n_servers)
+    return dict(sizes)
+
+
+def _model3(inst: InstanceTBPP, lb_servers: int, mods: Collection[str]) -> dict[str, Size]:
+    sizes = defaultdict(Size)
+    s = np.asarray(inst.s)
+    e = np.asarray(inst.e)
+    c = np.asarray(inst.c)
+    n = inst.n
+    for k in range(n):
+        # jobs that may share the server opened by job k
+        fits = (e[k] <= s[k + 1:]) | (c[k + 1:] + c[k] <= inst.cap)
+        col = np.concatenate([[k], np.arange(k + 1, n)[fits]])
+        sc = s[col]
+        ec = e[col]
+        es = np.sort(ec)
+        pos = np.arange(len(col))
+        sizes['vars'] += Size(len(col))
+        sizes['assign'] += Size(0, 0, len(col))
+        rows = np.ones(len(col), dtype=bool)
+        if 'dominance' in mods:
+            rows[:-1] = sc[1:] != sc[:-1]
+        rows[0] = False
+        # x[k, k] merges with the left hand side if job k is still running
+        cnt = pos + 1 - np.searchsorted(es, sc, 'right') + (ec[0] <= sc)
+        sizes['cap'] += Size(0, int(rows.sum()), int(cnt[rows].sum()))
+        cnt = pos - np.searchsorted(es, sc, 'left')
+        sizes['fireup'] += Size(0, len(col), int(cnt.sum()) + 2 * len(col))
+        sizes['vi2'] += Size(0, len(col) - 1, 2 * (len(col) - 1))
+    sizes['vars'] += Size(n)
+    sizes['assign'] += Size(0, n, 0)
+    if lb_servers > 0:
+        sizes['symmetry'] = Size(0, 1, n)
+    sizes['vi1'] = Size(0, n, 2 * n)
+    return dict(sizes)
+
+
+def family_sizes(
+    inst: InstanceTBPP, model_name: str,
+    lb_servers: int = 0, ub_servers: int = 0,
+    mods: Optional[Collection[str]] = None,
+) -> dict[str, Size]:
+    """Size of every constraint family of a model, and of all variables
+    under 'vars', without building it.
+
+    The instance has to be sorted as for the builders. The sizes are exact
+    apart from the conflict constraints (see `_conflicts`). Families of
+    modifiers are included if `mods` holds the modifier, by default all of
+    them except the structural ones (`STRUCTURAL_MODS`).
+    """
+    assert model_name in MODS
+    mods = MODS[model_name] - STRUCTURAL_MODS if mods is None else frozenset(mods)
+    assert mods <= MODS[model_name]
+    if model_name == 'model3':
+        return _model3(inst, lb_servers, mods)
+    n_servers = inst.n if ub_servers == 0 else ub_servers
+    units = _Units.of(inst, 'aggregate' in mods)
+    if model_name == 'model1':
+        return _model1(inst, units, lb_servers, n_servers, mods)
+    return _model2(inst, units, lb_servers, n_servers, mods)
+
+
+def _total(sizes: dict[str, Size], mods: Collection[str]) -> Size:
+    size = Size()
+    for name, fam in sizes.items():
+        if FAMILY_MODS.get(name, None) in {None, *mods}:
+            size += fam
+    return size
+
+
+def estimate_size(
+    inst: InstanceTBPP, model_name: str, mods: Collection[str],
+    lb_servers: int = 0, ub_servers: int = 0,
+) -> Size:
+    return _total(family_sizes(inst, model_name, lb_servers, ub_servers, mods), mods)
+
+
+def features(inst: InstanceTBPP) -> dict[str, float]:
+    """Features of an instance that the size estimates do not capture.
+
+    overlap: mean number of active jobs at the time points of the cliques
+    load: mean total size of these jobs relative to the capacity
+    large: share of jobs that cannot share a server with each other
+    duplicates: share of jobs that are identical to an earlier job
+    """
+    s = np.asarray(inst.s)
+    e = np.asarray(inst.e)
+    c = np.asarray(inst.c)
+    t = _nd_starts(np.unique(s), np.unique(e))
+    os_ = np.argsort(s, kind='stable')
+    oe = np.argsort(e, kind='stable')
+    cs = np.concatenate([[0], np.cumsum(c[os_])])
+    ce = np.concatenate([[0], np.cumsum(c[oe])])
+    active = _active(s[os_], e[oe], t)
+    load = cs[np.searchsorted(s[os_], t, 'right')] - ce[np.searchsorted(e[oe], t, 'right')]
+    return dict(
+        n=float(inst.n),
+        overlap=float(active.mean()) if len(t) > 0 else 0.0,
+        load=float(load.mean()) / inst.cap if len(t) > 0 else 0.0,
+        large=float((2 * c > inst.cap).mean()),
+        duplicates=1.0 - len(group_identical(inst)) / max(1, inst.n),
+    )
+
+
+def _regressors(size: Size, feats: dict[str, float]) -> np.ndarray:
+    return np.array([
+        1.0,
+        math.log(1 + size.nnz),
+        math.log(1 + size.nvar),
+        math.log(1 + size.ncon),
+        math.log(1 + feats['overlap']),
+        feats['load'],
+        feats['large'],
+        feats['duplicates'],
+    ])
+
+
+@dataclasses.dataclass
+class Prediction:
+    model_name: str
+    mods: frozenset[str]
+    size: Size
+    # predicted build and solve time in seconds, None without calibration
+    time: Optional[float]
+
+
+@dataclasses.dataclass
+class Selector:
+    """Picks the model and modifiers with the least predicted time.
+
+    The log of the time is linear in `REGRESSORS` with coefficients per
+    configuration, fitted by `calibrate`. Configurations with less than
+    `min_samples` samples are not considered. Without any, the default
+    modifiers of every model (and 'aggregate' if the instance has identical
+    jobs) are ranked by their estimated nnz.
+    """
+    coef: dict[str, list[float]] = dataclasses.field(default_factory=dict)
+    samples: dict[str, int] = dataclasses.field(default_factory=dict)
+    rmse: dict[str, float] = dataclasses.field(default_factory=dict)
+    min_samples: int = 5
+
+    def configs(self, feats: dict[str, float]) -> list[tuple[str, frozenset[str]]]:
+        configs = [
+            parse_key(key) for key, cnt in self.samples.items()
+            if cnt >= self.min_samples
+        ]
+        if len(configs) > 0:
+            return configs
+        for model_name in MODS:
+            mods = default_mods(model_name)
+            configs.append((model_name, mods))
+            if feats['duplicates'] > 0 and 'aggregate' in MODS[model_name]:
+                configs.append((model_name, mods | {'aggregate'}))
+        return configs
+
+    def predict(self, inst: InstanceTBPP, lb_servers: int = 0, ub_servers: int = 0) -> list[Prediction]:
+        """Predictions of all configurations for a sorted instance, best first."""
+        feats = features(inst)
+        # the families with all non-structural modifiers, per structure
+        cache = {}
+        preds = []
+        for model_name, mods in self.configs(feats):
+            structure = (model_name, mods & STRUCTURAL_MODS)
+            if structure not in cache:
+                full = (MODS[model_name] - STRUCTURAL_MODS) | structure[1]
+                cache[structure] = family_sizes(inst, model_name, lb_servers, ub_servers, full)
+            size = _total(cache[structure], mods)
+            key = config_key(model_name, mods)
+            time = None
+            if key in self.coef:
+                time = math.exp(float(np.dot(self.coef[key], _regressors(size, feats))))
+            preds.append(Prediction(model_name, mods, size, time))
+        return sorted(preds, key=lambda p: p.size.nnz if p.time is None else p.time)
+
+    def select(self, inst: InstanceTBPP, lb_servers: int = 0, ub_servers: int = 0) -> tuple[str, frozenset[str]]:
+        best = self.predict(inst, lb_servers, ub_servers)[0]
+        return best.model_name, best.mods
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(dict(regressors=list(REGRESSORS), **dataclasses.asdict(self)), f, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> 'Selector':
+        with open(path) as f:
+            data = json.load(f)
+        assert tuple(data.pop('regressors')) == REGRESSORS, 'selector of another version'
+        return cls(**data)
+
+
+def calibrate(
+    records: Iterable[dict],
+    load: Callable[[str, str], InstanceTBPP],
+    ridge: float = 1e-2,
+    penalty: float = 2.0,
+    min_samples: int = 5,
+) -> Selector:
+    """Fit the selector to records of the benchmark runner.
+
+    `load(group, inst_name)` returns the lifted and sorted instance of a
+    record. The logged sizes are used instead of the estimates. Runs that
+    hit the time limit count with `penalty` times their solve time (PAR2
+    for the default). The coefficients are ridge regression estimates,
+    the constant is not penalized.
+    """
+    feats = {}
+    data = defaultdict(list)
+    for rec in records:
+        model_name = rec.get('selected', rec['model_name'])
+        mods = rec.get('mods', None)
+        mods = default_mods(model_name) if mods is None else frozenset(mods)
+        inst_key = (rec['group'], rec['inst_name'])
+        if inst_key not in feats:
+            feats[inst_key] = features(load(*inst_key))
+        size = Size(rec['nvar'], rec['ncon'], rec['nnz'])
+        dt = rec['dt_model'] + rec['dt_solve'] * (1.0 if rec['solved'] else penalty)
+        data[config_key(model_name, mods)].append((_regressors(size, feats[inst_key]), math.log(max(dt, 1e-3))))
+
+    selector = Selector(min_samples=min_samples)
+    reg = ridge * np.eye(len(REGRESSORS))
+    reg[0, 0] = 0.0
+    for key, rows in data.items():
+        x = np.array([row for row, _ in rows])
+        y = np.array([val for _, val in rows])
+        coef = np.linalg.solve(x.T @ x + len(rows) * reg, x.T @ y)
+        selector.coef[key] = coef.tolist()
+        selector.samples[key] = len(rows)
+        selector.rmse[key] = float(np.sqrt(np.mean((x @ coef - y) ** 2)))
+    return selector
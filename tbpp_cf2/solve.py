@@ -0,0 +1,383 @@
+import dataclasses
+import json
+import math
+import os
+import tempfile
+import time
+from collections.abc import Collection
+from typing import TYPE_CHECKING, Optional, Union
+import numpy as np
+from . import ir
+
+if TYPE_CHECKING:
+    import gurobipy as gp
+
+__all__ = [
+    'Checkpoint', 'CheckpointCallback', 'BoundTrace', 'BoundCallback', 'optimize',
+    'LP_METHODS', 'LPResult', 'solve_lp', 'set_priority', 'set_hints',
+    'SERVER_PRIORITY', 'apply_params', 'load_profile',
+]
+
+# profile entry that is not a Gurobi parameter, the branch priority of the
+# variables of the server count (z in model1 and model2, x[k, k] in model3)
+SERVER_PRIORITY = 'ServerPriority'
+
+
+@dataclasses.dataclass
+class Checkpoint:
+    # identifies the model, checkpoints of other models are ignored
+    key: Optional[str]
+    alloc: list[list[int]]
+    servers: Optional[float] = None
+    fireups: Optional[float] = None
+    value: float = math.inf
+    bound: float = -math.inf
+    # solve time of all runs
+    runtime: float = 0.0
+
+    @classmethod
+    def load(cls, path: str, key: Optional[str] = None) -> Optional['Checkpoint']:
+        try:
+            with open(path) as f:
+                ckpt = cls(**json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            return None
+        return ckpt if key is None or ckpt.key == key else None
+
+    def save(self, path: str):
+        dirname = os.path.dirname(path) or '.'
+        os.makedirs(dirname, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dataclasses.asdict(self), f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def _terms(expr: 'gp.LinExpr') -> tuple[list, list[float], float]:
+    return (
+        [expr.getVar(i) for i in range(expr.size())],
+        [expr.getCoeff(i) for i in range(expr.size())],
+        expr.getConstant(),
+    )
+
+
+class CheckpointCallback:
+    """Gurobi callback that saves every improving incumbent and, at most
+    every `interval` seconds, an improved bound to `path`."""
+
+    def __init__(self, model: 'gp.Model', path: str, ckpt: Checkpoint, interval: float = 30.0):
+        import gurobipy as gp
+        self.GRB = gp.GRB
+        self.path = path
+        self.ckpt = ckpt
+        self.interval = interval
+        x = model._vars['x']
+        self._keys = list(x.keys())
+        self._x = list(x.values())
+        self._servers = _terms(model._servers)
+        self._fireups = _terms(model._fireups)
+        self._runtime = ckpt.runtime
+        self._t_saved = time.time()
+
+    def _value(self, model: 'gp.Model', terms) -> float:
+        vs, coefs, const = terms
+        return sum(a * v for a, v in zip(coefs, model.cbGetSolution(vs))) + const
+
+    def _save(self, model: 'gp.Model'):
+        self.ckpt.runtime = self._runtime + model.cbGet(self.GRB.Callback.RUNTIME)
+        self.ckpt.save(self.path)
+        self._t_saved = time.time()
+
+    def __call__(self, model: 'gp.Model', where: int):
+        cb = self.GRB.Callback
+        ckpt = self.ckpt
+        if where == cb.MIPSOL:
+            obj = model.cbGet(cb.MIPSOL_OBJ)
+            ckpt.bound = max(ckpt.bound, model.cbGet(cb.MIPSOL_OBJBND))
+            if obj < ckpt.value - 1e-9:
+                values = dict(zip(self._keys, model.cbGetSolution(self._x)))
+                ckpt.alloc = [sorted(pat) for pat in model._get_allocation(values)]
+                ckpt.servers = self._value(model, self._servers)
+                ckpt.fireups = self._value(model, self._fireups)
+                ckpt.value = obj
+                self._save(model)
+        elif where == cb.MIP:
+            bound = model.cbGet(cb.MIP_OBJBND)
+            if bound > ckpt.bound + 1e-9 and time.time() - self._t_saved >= self.interval:
+                ckpt.bound = bound
+                self._save(model)
+
+
+@dataclasses.dataclass
+class BoundTrace:
+    # objective of the root relaxation before cuts, mapped back to the
+    # variables of the model; Gurobi solves it for the presolved model, so
+    # it is neither the LP relaxation of the model nor always stronger
+    root_lp: Optional[float] = None
+    # run time when the root relaxation was solved
+    root_time: Optional[float] = None
+    # bound after the cuts of the root node
+    root_bound: Optional[float] = None
+    # (run time, bound, incumbent value) whenever the bound or the
+    # incumbent improved
+    trajectory: list[tuple[float, float, float]] = dataclasses.field(default_factory=list)
+
+
+class BoundCallback:
+    """Gurobi callback that records the root bounds and the bound
+    trajectory of a solve in `trace`."""
+
+    def __init__(self, model: 'gp.Model', trace: BoundTrace):
+        import gurobipy as gp
+        self.GRB = gp.GRB
+        self.trace = trace
+        self._vars = model.getVars()
+        self._obj = np.array(model.getAttr('Obj', self._vars))
+        self._const = model.ObjCon
+
+    def __call__(self, model: 'gp.Model', where: int):
+        cb = self.GRB.Callback
+        trace = self.trace
+        if where == cb.MIPNODE:
+            # called at the root after the relaxation and every cut round
+            if model.cbGet(cb.MIPNODE_NODCNT) > 0 or model.cbGet(cb.MIPNODE_STATUS) != self.GRB.OPTIMAL:
+                return
+            if trace.root_lp is None:
+                rel = np.array(model.cbGetNodeRel(self._vars))
+                trace.root_lp = float(self._obj @ rel) + self._const
+                trace.root_time = model.cbGet(cb.RUNTIME)
+            trace.root_bound = model.cbGet(cb.MIPNODE_OBJBND)
+        elif where == cb.MIP:
+            bound = model.cbGet(cb.MIP_OBJBND)
+            best = model.cbGet(cb.MIP_OBJBST)
+            last = trace.trajectory[-1] if len(trace.trajectory) > 0 else None
+            if last is None or bound > last[1] + 1e-9 or best < last[2] - 1e-9:
+                trace.trajectory.append((model.cbGet(cb.RUNTIME), bound, best))
+
+
+def optimize(
+    model: Union['gp.Model', ir.Model],
+    checkpoint: Optional[str] = None,
+    key: Optional[str] = None,
+    time_limit: Optional[float] = None,
+    interval: float = 30.0,
+    trace: Optional[BoundTrace] = None,
+) -> Checkpoint:
+    """Optimize a model of `model1`, `model2` or `model3` with checkpoints.
+
+    If the file `checkpoint` holds a checkpoint with the same `key`, its
+    allocation becomes the MIP start and its run time counts towards
+    `time_limit`, which limits the total time of all runs. During the solve,
+    new incumbents and bounds are saved to the file. With `trace`, the root
+    bounds and the bound trajectory of this run are recorded. Models of the
+    HiGHS backend have no callbacks, their checkpoints are saved after the
+    solve only and their trace holds the final bound only. Returns the final checkpoint,
+    whose bound is the best one of all runs.
+    """
+    ckpt = Checkpoint.load(checkpoint, key) if checkpoint is not None else None
+    if ckpt is None:
+        ckpt = Checkpoint(key=key, alloc=[])
+    elif len(ckpt.alloc) > 0:
+        model._set_start([frozenset(pat) for pat in ckpt.alloc])
+    if time_limit is not None:
+        model.setParam('TimeLimit', max(0.0, time_limit - ckpt.runtime))
+
+    callbacks = []
+    if not isinstance(model, ir.Model):
+        if checkpoint is not None:
+            callbacks.append(CheckpointCallback(model, checkpoint, ckpt, interval))
+        if trace is not None:
+            callbacks.append(BoundCallback(model, trace))
+
+    def callback(model, where):
+        for cb in callbacks:
+            cb(model, where)
+
+    runtime = ckpt.runtime
+    if len(callbacks) == 0:
+        model.optimize()
+    else:
+        model.optimize(callback)
+
+    ckpt.runtime = runtime + model.Runtime
+    ckpt.bound = max(ckpt.bound, model.ObjBound)
+    if model.SolCount > 0 and model.ObjVal < ckpt.value - 1e-9:
+        ckpt.alloc = [sorted(pat) for pat in model._get_allocation()]
+        ckpt.servers = model._servers.getValue()
+        ckpt.fireups = model._fireups.getValue()
+        ckpt.value = model.ObjVal
+    if checkpoint is not None:
+        ckpt.save(checkpoint)
+    if trace is not None and model.NodeCount <= 1 and (
+        trace.root_lp is not None or model.Status == ir.Status.OPTIMAL
+    ):
+        # stopped at the root, possibly after the last cut round or without
+        # a callback at all if the root relaxation closed the gap
+        trace.root_bound = model.ObjBound
+    if trace is not None and model.SolCount > 0:
+        # the last improvement can happen after the last callback
+        final = (model.Runtime, model.ObjBound, model.ObjVal)
+        if len(trace.trajectory) == 0 or trace.trajectory[-1][1:] != final[1:]:
+            trace.trajectory.append(final)
+    return ckpt
+
+
+# values of the Gurobi parameter Method
+LP_METHODS = dict(primal=0, dual=1, barrier=2, concurrent=3)
+
+
+@dataclasses.dataclass
+class LPResult:
+    # None unless solved to optimality
+    value: Optional[float]
+    runtime: float
+    status: int
+
+
+def solve_lp(
+    model: Union['gp.Model', ir.Model],
+    method: str = 'barrier',
+    crossover: bool = False,
+    time_limit: Optional[float] = None,
+    in_place: bool = False,
+) -> LPResult:
+    """Solve the LP relaxation of a model.
+
+    Barrier without crossover is usually the fastest way to the bound of
+    the large models; crossover gives a basic solution. With `in_place`, a
+    Gurobi model is relaxed itself instead of a copy, which needs no memory
+    for a second model, and restored afterwards, including its parameters.
+    The value is None unless the LP is solved to optimality, e.g. within
+    `time_limit`. HiGHS models are copied and ignore `method` and
+    `crossover`.
+    """
+    if isinstance(model, ir.Model):
+        relaxed = model.relax()
+        if time_limit is not None:
+            relaxed.setParam('TimeLimit', time_limit)
+        relaxed.optimize()
+        value = relaxed.ObjVal if relaxed.Status == ir.Status.OPTIMAL else None
+        return LPResult(value, relaxed.Runtime, relaxed.Status)
+
+    # the time limit of a previous (MIP) solve does not apply
+    params = dict(
+        Method=LP_METHODS[method],
+        Crossover=-1 if crossover else 0,
+        TimeLimit=time_limit if time_limit is not None else ir.INFINITY,
+    )
+    if in_place:
+        model.update()
+        vs = model.getVars()
+        vtype = model.getAttr('VType', vs)
+        binary = [v for v, t in zip(vs, vtype) if t == ir.BINARY]
+        lb = model.getAttr('LB', binary)
+        ub = model.getAttr('UB', binary)
+        saved = {name: model.getParamInfo(name)[2] for name in params}
+        model.setAttr('VType', vs, [ir.CONTINUOUS] * len(vs))
+        model.setAttr('LB', binary, [max(a, 0.0) for a in lb])
+        model.setAttr('UB', binary, [min(a, 1.0) for a in ub])
+        relaxed = model
+    else:
+        relaxed = model.relax()
+    try:
+        for name, value in params.items():
+            relaxed.setParam(name, value)
+        relaxed.optimize()
+        value = relaxed.ObjVal if relaxed.Status == ir.Status.OPTIMAL else None
+        res = LPResult(value, relaxed.Runtime, relaxed.Status)
+    finally:
+        if in_place:
+            model.setAttr('VType', vs, vtype)
+            model.setAttr('LB', binary, lb)
+            model.setAttr('UB', binary, ub)
+            for name, value in saved.items():
+                model.setParam(name, value)
+            model.update()
+        else:
+            relaxed.dispose()
+    return res
+
+
+def _expr_vars(model: Union['gp.Model', ir.Model], expr) -> list:
+    if isinstance(model, ir.Model):
+        return [ir.Var(model, i) for i in expr.idx]
+    return _terms(expr)[0]
+
+
+def set_priority(model: Union['gp.Model', ir.Model], priority: int):
+    """Branch priority of the variables of the server count (z in model1
+    and model2, x[k, k] in model3). HiGHS ignores it."""
+    vs = _expr_vars(model, model._servers)
+    model.setAttr('BranchPriority', vs, [int(priority)] * len(vs))
+
+
+def set_hints(
+    model: Union['gp.Model', ir.Model],
+    hints: Union[str, Collection[frozenset[int]]],
+    time_limit: float = 10.0,
+):
+    """Set VarHintVal and VarHintPri from an allocation or, for
+    `hints='lp'`, from the LP relaxation solved within `time_limit`.
+
+    The hints of an allocation are the values of `_set_start` (the start
+    is reset afterwards), with priority 2 for the server variables, 1 for
+    the fire-up variables and 0 for the others. LP values are rounded and
+    their priority falls from 10 for integral values to 0 for values
+    halfway between two integers, which get no hint. HiGHS ignores hints.
+    """
+    vs = model.getVars()
+    if hints == 'lp':
+        relaxed = model.relax()
+        relaxed.setParam('TimeLimit', time_limit)
+        relaxed.optimize()
+        if relaxed.SolCount == 0:
+            return
+        values = relaxed.getAttr('X', relaxed.getVars())
+        if hasattr(relaxed, 'dispose'):
+            relaxed.dispose()
+        hinted, vals, pris = [], [], []
+        for v, val in zip(vs, values):
+            pri = int(round(10 * (1 - 2 * abs(val - round(val)))))
+            if pri > 0:
+                hinted.append(v)
+                vals.append(float(round(val)))
+                pris.append(pri)
+    else:
+        model._set_start(hints)
+        # pending attribute values are read after an update
+        model.update()
+        start = model.getAttr('Start', vs)
+        model.setAttr('Start', vs, [ir.UNDEFINED] * len(vs))
+        pri = {v.index: 2 for v in _expr_vars(model, model._servers)}
+        for v in _expr_vars(model, model._fireups):
+            pri.setdefault(v.index, 1)
+        hinted, vals, pris = [], [], []
+        for v, val in zip(vs, start):
+            # variables that the start leaves undefined
+            if not math.isnan(val) and val < ir.INFINITY:
+                hinted.append(v)
+                vals.append(val)
+                pris.append(pri.get(v.index, 0))
+    model.setAttr('VarHintVal', hinted, vals)
+    model.setAttr('VarHintPri', hinted, pris)
+
+
+def apply_params(model: Union['gp.Model', ir.Model], params: dict):
+    """Set the parameters of a profile, `SERVER_PRIORITY` through
+    `set_priority`."""
+    for name, value in params.items():
+        if name == SERVER_PRIORITY:
+            set_priority(model, value)
+        else:
+            model.setParam(name, value)
+
+
+def load_profile(path: str) -> dict[str, dict[str, dict]]:
+    """Parameters by group and model name, as written by
+    `tbpp_cf2.bench.tuning`. Missing groups and models use the defaults."""
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,103 @@
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import gurobipy as gp
+
+__all__ = ['BuildStats', 'configure', 'new_stats']
+
+Hook = Callable[[str, dict], None]
+
+
+class BuildStats:
+    """Timing and size of the phases of a model build.
+
+    Each call of `lap` closes the phase that started with the previous call
+    and stores `dict(time[, peak_mem][, vars, rows, nnz])` in `phases`. The
+    counts of variables, rows and nonzeros need a model update and are only
+    collected if the model is passed. Every record is also passed to `hook`.
+    """
+    enabled = True
+
+    def __init__(self, memory: bool = False, hook: Optional[Hook] = None):
+        self.memory = memory
+        self.hook = hook
+        self.phases = dict[str, dict]()
+        self.total = dict()
+        self._own_trace = False
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_trace = True
+        self._size = (0, 0, 0)
+        self._t_start = self._t = time.perf_counter()
+
+    def lap(self, name: str, model: Optional['gp.Model'] = None):
+        rec = dict(time=time.perf_counter() - self._t)
+        if self.memory:
+            rec['peak_mem'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        if model is not None:
+            model.update()
+            size = (model.NumVars, model.NumConstrs, model.NumNZs)
+            rec['vars'], rec['rows'], rec['nnz'] = (
+                v1 - v0 for v0, v1 in zip(self._size, size)
+            )
+            self._size = size
+        self.phases[name] = rec
+        if self.hook is not None:
+            self.hook(name, rec)
+        # do not count the time spent here
+        self._t = time.perf_counter()
+
+    def finish(self, model: 'gp.Model'):
+        model.update()
+        self.total = dict(
+            time=time.perf_counter() - self._t_start,
+            vars=model.NumVars, rows=model.NumConstrs, nnz=model.NumNZs,
+        )
+        if self.memory:
+            self.total['peak_mem'] = max(
+                (rec['peak_mem'] for rec in self.phases.values()), default=0
+            )
+            if self._own_trace:
+                tracemalloc.stop()
+        if self.hook is not None:
+            self.hook('total', self.total)
+
+    def as_dict(self) -> dict:
+        return dict(phases=self.phases, total=self.total)
+
+
+class _NoStats:
+    enabled = False
+    phases = {}
+    total = {}
+
+    def start(self):
+        pass
+
+    def lap(self, name: str, model: Optional['gp.Model'] = None):
+        pass
+
+    def finish(self, model: 'gp.Model'):
+        pass
+
+    def as_dict(self) -> dict:
+        return {}
+
+
+NO_STATS = _NoStats()
+_defaults = None
+
+
+def configure(enabled: bool = True, memory: bool = False, hook: Optional[Hook] = None):
+    """Set whether builds without an explicit `stats` argument collect stats."""
+    global _defaults
+    _defaults = dict(memory=memory, hook=hook) if enabled else None
+
+
+def new_stats():
+    return NO_STATS if _defaults is None else BuildStats(**_defaults)
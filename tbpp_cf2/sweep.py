@@ -0,0 +1,144 @@
+import dataclasses
+import math
+from collections.abc import Collection, Sequence
+from typing import Callable, Optional
+import gurobipy as gp
+from .instance import InstanceTBPPFU
+
+__all__ = ['SweepPoint', 'set_gamma', 'build_for_gammas', 'gamma_sweep', 'pareto_front']
+
+Pattern = frozenset[int]
+
+
+@dataclasses.dataclass
+class SweepPoint:
+    # None for the points of the Pareto front
+    gamma: Optional[float]
+    value: float
+    bound: float
+    servers: int
+    fireups: int
+    solved: bool
+    runtime: float
+    alloc: list[Pattern]
+
+
+def set_gamma(model: gp.Model, gamma: float):
+    # model1 and model2 put the weight into the objective coefficients of w,
+    # model3 into the objective, this works for all of them
+    model.setObjective(model._servers + gamma * model._fireups, gp.GRB.MINIMIZE)
+
+
+def _servers_fireups(inst: InstanceTBPPFU, alloc: Collection[Pattern]) -> tuple[int, int]:
+    value = InstanceTBPPFU.extend(inst, 1.0).compute_value(alloc)
+    servers = len(alloc)
+    return servers, int(round(value - servers))
+
+
+def build_for_gammas(
+    build: Callable[..., gp.Model], inst: InstanceTBPPFU, gammas: Sequence[float],
+    alloc: Collection[Pattern], **kwargs,
+) -> gp.Model:
+    """Build a model that is valid for all weights.
+
+    The server count of an optimal solution for weight gamma is at most the
+    value of `alloc` divided by 1 + gamma, the model uses the largest of
+    these bounds.
+    """
+    servers, fireups = _servers_fireups(inst, alloc)
+    ub_servers = max(
+        int(math.ceil((servers + gamma * fireups) / (1.0 + gamma) - 1e-8))
+        for gamma in gammas
+    )
+    return build(InstanceTBPPFU.extend(inst, gammas[0]), ub_servers=ub_servers, **kwargs)
+
+
+def _solve(model: gp.Model, gamma: Optional[float]) -> SweepPoint:
+    model.optimize()
+    if model.Status == gp.GRB.Status.INTERRUPTED:
+        raise KeyboardInterrupt()
+    has_sol = model.SolCount > 0
+    return SweepPoint(
+        gamma=gamma,
+        value=model.ObjVal if has_sol else math.inf,
+        bound=model.ObjBound,
+        servers=int(round(model._servers.getValue())) if has_sol else -1,
+        fireups=int(round(model._fireups.getValue())) if has_sol else -1,
+        solved=model.Status == gp.GRB.Status.OPTIMAL,
+        runtime=model.Runtime,
+        alloc=model._get_allocation() if has_sol else [],
+    )
+
+
+def _keep_start(model: gp.Model):
+    # the previous solution is a MIP start for the next weight
+    if model.SolCount > 0:
+        vs = model.getVars()
+        model.setAttr('Start', vs, model.getAttr('X', vs))
+
+
+def gamma_sweep(
+    model: gp.Model, gammas: Sequence[float],
+    alloc: Optional[Collection[Pattern]] = None,
+) -> list[SweepPoint]:
+    """Solve the model for every weight in `gammas`.
+
+    Only the objective changes between the solves, and every solve starts
+    from the solution of the previous one (or from `alloc` for the first).
+    Gurobi does not keep cuts or the search tree of a MIP after the
+    objective changed, so neighbouring weights should be solved one after
+    the other.
+    """
+    points = []
+    if alloc is not None:
+        model._set_start(alloc)
+    for gamma in gammas:
+        set_gamma(model, gamma)
+        points.append(_solve(model, gamma))
+        _keep_start(model)
+    return points
+
+
+def pareto_front(model: gp.Model, max_points: Optional[int] = None) -> list[SweepPoint]:
+    """Non-dominated pairs of server and fire-up counts.
+
+    Starting from the least number of servers, the fire-ups are restricted
+    to be less than in the previous point and the servers are minimized
+    again, with the fire-ups as the secondary objective. Every point is
+    solved with an absolute gap below the weight of the fire-ups, so its
+    fire-ups are minimal for its servers. A point that is not solved to
+    optimality, e.g. due to the time limit, may be dominated and ends the
+    front, its `solved` is False. The points are limited by the server
+    bound the model was built with. Afterwards, the constraint on the
+    fire-ups is removed and the objective and parameters are restored.
+    """
+    objective = model.getObjective()
+    sense = model.ModelSense
+    fireups = model._fireups
+    # fire-ups are at most the number of fire-up variables, so this weight
+    # only breaks ties between solutions with the same server count
+    delta = 1.0 / (fireups.size() + 1)
+    params = dict(MIPGap=0.0, MIPGapAbs=delta / 2)
+    saved = {name: model.getParamInfo(name)[2] for name in params}
+    set_gamma(model, delta)
+    eps = model.addLConstr(fireups, gp.GRB.LESS_EQUAL, gp.GRB.INFINITY, name='eps_fireups')
+
+    points = []
+    try:
+        for name, value in params.items():
+            model.setParam(name, value)
+        while max_points is None or len(points) < max_points:
+            point = _solve(model, None)
+            if point.servers < 0:
+                break
+            points.append(point)
+            if not point.solved:
+                break
+            eps.RHS = point.fireups - 1
+    finally:
+        model.remove(eps)
+        model.setObjective(objective, sense)
+        for name, value in saved.items():
+            model.setParam(name, value)
+        model.update()
+    return points
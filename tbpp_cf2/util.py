@@ -1,7 +1,8 @@
-from itertools import tee
+from itertools import islice, tee
+from typing import Optional
 from .instance import InstanceTBPP
 
-__all__ = ['pairwise', 'compute_conflict_cliques']
+__all__ = ['pairwise', 'compute_conflict_cliques', 'group_identical', 'get_allocation']
 
 
 def pairwise(iterable):
@@ -78,3 +79,28 @@ def compute_conflict_cliques(inst: InstanceTBPP, ub_servers: int):
         ccs.append(cs_k)
         cs_0 = cs_k
     return ccs
+
+
+def group_identical(inst: InstanceTBPP) -> list[list[int]]:
+    "jobs with equal start, end and size, ordered by their first job"
+    groups = dict[tuple[int, int, int], list[int]]()
+    for i in range(inst.n):
+        groups.setdefault((inst.s[i], inst.e[i], inst.c[i]), []).append(i)
+    return list(groups.values())
+
+
+def get_allocation(model, values: Optional[dict] = None, groups: Optional[list[list[int]]] = None) -> list[frozenset[int]]:
+    """Allocation of a solved model from its variables x by (job, server),
+    or by (group, server) with the jobs of `groups`. `values` of x by key,
+    e.g. from a callback, replace the solution."""
+    x = model._vars['x']
+    if values is None:
+        values = dict(zip(x.keys(), model.getAttr('X', list(x.values()))))
+    # jobs of a group are handed out to the servers in order
+    jobs = None if groups is None else [iter(grp) for grp in groups]
+    pats = dict[int, set[int]]()
+    for g, k in sorted(values, key=lambda gk: gk[1]):
+        cnt = int(round(values[g, k]))
+        if cnt > 0:
+            pats.setdefault(k, set()).update([g] if jobs is None else islice(jobs[g], cnt))
+    return [frozenset(pats[k]) for k in sorted(pats)]
@@ -0,0 +1,37 @@
+from collections.abc import Iterator
+from tbpp_cf2 import InstanceTBPP
+
+
+def partitions(items: list[int]) -> Iterator[list[list[int]]]:
+    if len(items) == 0:
+        yield []
+        return
+    first, rest = items[0], items[1:]
+    for part in partitions(rest):
+        yield [[first]] + part
+        for idx in range(len(part)):
+            yield part[:idx] + [[first] + part[idx]] + part[idx + 1:]
+
+
+def fits(inst: InstanceTBPP, pat) -> bool:
+    # the load is largest at the start of a job
+    return all(
+        sum(inst.c[i] for i in pat if inst.s[i] <= inst.s[j] < inst.e[i]) <= inst.cap
+        for j in pat
+    )
+
+
+def fireups(inst: InstanceTBPP, pat) -> int:
+    count = 0
+    last_e = float('-inf')
+    for j in sorted(pat, key=lambda j: inst.s[j]):
+        if inst.s[j] > last_e:
+            count += 1
+        last_e = max(last_e, inst.e[j])
+    return count
+
+
+def feasible_allocations(inst: InstanceTBPP) -> Iterator[list[frozenset[int]]]:
+    for part in partitions(list(range(inst.n))):
+        if all(fits(inst, pat) for pat in part):
+            yield [frozenset(pat) for pat in part]
@@ -0,0 +1,57 @@
+import random
+import pytest
+
+gp = pytest.importorskip('gurobipy')
+
+from tbpp_cf2 import InstanceTBPP, InstanceTBPPFU, heuristic, model1, model2, model3
+from tbpp_cf2.util import group_identical
+
+
+@pytest.fixture(autouse=True, scope='module')
+def quiet():
+    gp.setParam('OutputFlag', 0)
+
+
+def duplicated_instance(seed: int) -> InstanceTBPPFU:
+    # a few random jobs, each repeated up to three times
+    rng = random.Random(seed)
+    base = InstanceTBPP.random(5, 10, max_s=6, max_dt=5, min_c=2, max_c=6, seed=seed)
+    s, e, c = [], [], []
+    for i in range(base.n):
+        for _ in range(rng.randint(1, 3)):
+            s.append(base.s[i])
+            e.append(base.e[i])
+            c.append(base.c[i])
+    return InstanceTBPPFU.extend(InstanceTBPP(s, e, c, base.cap).sorted(), gamma=1.0)
+
+
+def solve(build, inst: InstanceTBPPFU, mods: set[str]):
+    alloc = heuristic.best_look_ahead(inst, {1, 2, inst.n})
+    model = build(inst, ub_servers=len(alloc), mods=mods)
+    model.update()
+    model._set_start(alloc)
+    model.optimize()
+    assert model.Status == gp.GRB.Status.OPTIMAL
+    return model
+
+
+def test_group_identical():
+    inst = duplicated_instance(0)
+    groups = group_identical(inst)
+    assert sorted(i for grp in groups for i in grp) == list(range(inst.n))
+    assert [grp[0] for grp in groups] == sorted(grp[0] for grp in groups)
+    for grp in groups:
+        assert len({(inst.s[i], inst.e[i], inst.c[i]) for i in grp}) == 1
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_aggregate_optimum(seed: int):
+    inst = duplicated_instance(seed)
+    opt = solve(model3.build, inst, {'vi1', 'vi2', 'dominance'}).ObjVal
+    for build in [model1.build, model2.build]:
+        for mods in [{'conflicts'}, {'conflicts', 'aggregate'}, {'aggregate'}]:
+            model = solve(build, inst, mods)
+            assert model.ObjVal == pytest.approx(opt)
+            alloc = model._get_allocation()
+            assert inst.is_feasible(alloc)
+            assert inst.compute_value(alloc) == pytest.approx(opt)
@@ -0,0 +1,51 @@
+import itertools
+import random
+import pytest
+from brute_force import feasible_allocations, fireups
+from tbpp_cf2 import InstanceTBPPFU
+from tbpp_cf2.bounds import bin_packing_bound, compute_bounds, peak_load_bound
+
+
+def bin_packing_optimum(c: list[int], cap: int) -> int:
+    # first fit over all orders is optimal for a few items
+    best = len(c)
+    for order in itertools.permutations(c):
+        loads = []
+        for a in order:
+            for idx, load in enumerate(loads):
+                if load + a <= cap:
+                    loads[idx] += a
+                    break
+            else:
+                loads.append(a)
+        best = min(best, len(loads))
+    return best
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_bin_packing_bound(seed: int):
+    rng = random.Random(seed)
+    cap = rng.randint(5, 20)
+    c = [rng.randint(1, cap) for _ in range(rng.randint(0, 7))]
+    assert bin_packing_bound(c, cap) <= bin_packing_optimum(c, cap)
+    assert bin_packing_bound(c, cap) >= -(-sum(c) // cap)
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_compute_bounds(seed: int):
+    rng = random.Random(seed)
+    inst = InstanceTBPPFU.random(
+        rng.randint(1, 7), 10, max_s=rng.randint(1, 5), max_dt=rng.randint(1, 5),
+        min_c=2, max_c=8, gamma=rng.choice([0.5, 1.0, 2.0]), seed=seed,
+    )
+    allocs = list(feasible_allocations(inst))
+    bounds = compute_bounds(inst)
+    assert peak_load_bound(inst) <= bounds.servers
+    assert bounds.servers <= min(len(alloc) for alloc in allocs)
+    assert bounds.fireups <= min(sum(fireups(inst, pat) for pat in alloc) for alloc in allocs)
+    assert bounds.value <= min(inst.compute_value(alloc) for alloc in allocs) + 1e-9
+
+
+def test_compute_bounds_workers():
+    inst = InstanceTBPPFU.random(60, 20, max_s=10, min_c=3, max_c=15, seed=1)
+    assert compute_bounds(inst, workers=2, chunk_size=4) == compute_bounds(inst)
@@ -0,0 +1,67 @@
+import multiprocessing
+import os
+import numpy as np
+import pytest
+from tbpp_cf2 import InstanceTBPP
+from tbpp_cf2.data import format1
+from tbpp_cf2.data.cache import Store
+
+
+def write_file(path: str, inst: InstanceTBPP):
+    with open(path, 'w') as f:
+        f.write(f'{inst.n} {inst.cap} 0 0\n')
+        for i in range(inst.n):
+            f.write(f'{i} {inst.s[i]} {inst.e[i]} {inst.c[i]}\n')
+
+
+@pytest.fixture
+def root(tmp_path) -> str:
+    for g, (n, cat) in enumerate([(10, 'A'), (12, 'B'), (15, 'C'), (8, 'D')]):
+        group = tmp_path / f'n{n} t20 {cat}'
+        group.mkdir()
+        for idx in range(3):
+            inst = InstanceTBPP.random(n, 100, max_s=20, seed=10 * g + idx)
+            write_file(str(group / f'cap100_n{n}_t20_{cat}_{idx}.txt'), inst)
+    return str(tmp_path)
+
+
+def assert_same(a: InstanceTBPP, b: InstanceTBPP):
+    assert a.cap == b.cap
+    for field in ('s', 'e', 'c'):
+        assert np.array_equal(np.asarray(getattr(a, field)), np.asarray(getattr(b, field)))
+
+
+def test_round_trip(root: str):
+    store = Store(root)
+    store.build()
+    assert format1.get_groups(root, cache=store) == format1.get_groups(root)
+    for n, t, cat in format1.get_groups(root):
+        group = f'n{n} t{t} {cat}'
+        plain = list(format1.read_instances(root, group))
+        cached = list(Store(root).instances(group))
+        assert [name for name, _ in plain] == [name for name, _ in cached]
+        for (name, a), (_, b) in zip(plain, cached):
+            assert_same(a, b)
+            assert_same(a, Store(root).get(group, name))
+
+
+def test_reconvert_changed_group(root: str):
+    group = 'n10 t20 A'
+    Store(root).build()
+    inst = InstanceTBPP.random(11, 100, max_s=20, seed=99)
+    path = os.path.join(root, group, 'cap100_n10_t20_A_0.txt')
+    write_file(path, inst)
+    os.utime(path, ns=(0, 0))
+    assert_same(Store(root).get(group, 'cap100_n10_t20_A_0.txt', validate=True), inst)
+
+
+def _convert(args):
+    root, group = args
+    Store(root).get(group, os.listdir(os.path.join(root, group))[0], validate=True)
+
+
+def test_concurrent_conversion(root: str):
+    groups = sorted(os.listdir(root))
+    with multiprocessing.get_context('spawn').Pool(4) as pool:
+        pool.map(_convert, [(root, group) for group in groups], chunksize=1)
+    assert sorted(Store(root).index['groups']) == groups
@@ -0,0 +1,73 @@
+import itertools
+import random
+import pytest
+
+gp = pytest.importorskip('gurobipy')
+
+from brute_force import feasible_allocations, fits
+from tbpp_cf2 import InstanceTBPPFU
+from tbpp_cf2.colgen import best_allocation, column_generation, price
+
+
+@pytest.fixture(autouse=True, scope='module')
+def quiet():
+    gp.setParam('OutputFlag', 0)
+
+
+def tiny_instance(seed: int) -> InstanceTBPPFU:
+    rng = random.Random(seed)
+    return InstanceTBPPFU.random(
+        rng.randint(1, 7), 10, max_s=rng.randint(1, 5), max_dt=rng.randint(1, 5),
+        min_c=2, max_c=8, gamma=rng.choice([0.5, 1.0, 2.0]), seed=seed,
+    )
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_price(seed: int):
+    inst = tiny_instance(seed)
+    rng = random.Random(seed)
+    duals = [rng.uniform(-1.0, 3.0) for _ in range(inst.n)]
+    # all feasible patterns
+    best = 0.0
+    for size in range(1, inst.n + 1):
+        for pat in itertools.combinations(range(inst.n), size):
+            if fits(inst, pat):
+                best = max(best, sum(duals[i] for i in pat) - inst.compute_value([frozenset(pat)]))
+
+    value, columns, exact = price(inst, duals)
+    assert exact
+    assert value == pytest.approx(best)
+    for pat in columns:
+        assert fits(inst, pat)
+        assert sum(duals[i] for i in pat) - inst.compute_value([pat]) > 0.0
+    if best > 1e-9:
+        assert sum(duals[i] for i in columns[0]) - inst.compute_value([columns[0]]) == pytest.approx(best)
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_column_generation(seed: int):
+    inst = tiny_instance(seed)
+    opt = min(inst.compute_value(alloc) for alloc in feasible_allocations(inst))
+    res = column_generation(inst, time_limit=10.0)
+    assert res.lb <= opt + 1e-6
+    assert res.lb <= res.value + 1e-6
+    alloc = best_allocation(inst, res.columns)
+    assert inst.is_feasible(alloc)
+    assert inst.compute_value(alloc) >= opt - 1e-9
+
+
+def test_best_allocation_without_time():
+    inst = InstanceTBPPFU.random(40, 10, max_s=8, min_c=2, max_c=8, seed=0)
+    start = [frozenset({i}) for i in range(inst.n)]
+    alloc = best_allocation(inst, [], time_limit=0.0, start=start)
+    assert inst.is_feasible(alloc)
+
+
+def test_column_generation_without_time():
+    inst = InstanceTBPPFU.random(40, 10, max_s=8, min_c=2, max_c=8, seed=0).sorted()
+    columns = [frozenset({i}) for i in range(inst.n)]
+    res = column_generation(inst, columns=columns, time_limit=0.0)
+    assert res.iterations == 1
+    assert res.lb <= res.value + 1e-6
+    # the restricted master problem of the single job patterns
+    assert res.value == pytest.approx(inst.compute_value(columns))
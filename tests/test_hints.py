@@ -0,0 +1,57 @@
+import pytest
+
+gp = pytest.importorskip('gurobipy')
+
+from tbpp_cf2 import InstanceTBPPFU, heuristic, model1, model2, model3
+
+
+@pytest.fixture(autouse=True, scope='module')
+def quiet():
+    gp.setParam('OutputFlag', 0)
+
+
+def instance() -> InstanceTBPPFU:
+    return InstanceTBPPFU.random(14, 30, max_s=6, min_c=4, max_c=20, seed=3).sorted()
+
+
+def server_vars(model: 'gp.Model') -> set[str]:
+    expr = model._servers
+    return {expr.getVar(i).VarName for i in range(expr.size())}
+
+
+@pytest.mark.parametrize('build', [model1.build, model2.build, model3.build])
+def test_priority_and_heuristic_hints(build):
+    inst = instance()
+    alloc = heuristic.best_look_ahead(inst, {1, 2, 3})
+    model = build(inst, ub_servers=len(alloc) + 2, priority=5, hints=alloc)
+    model.update()
+    servers = server_vars(model)
+    assert len(servers) > 0
+    for v in model.getVars():
+        assert v.BranchPriority == (5 if v.VarName in servers else 0)
+        # the start that gave the hints is reset
+        assert v.Start == gp.GRB.UNDEFINED
+
+    # the hints are the start values of the allocation
+    ref = build(inst, ub_servers=len(alloc) + 2)
+    ref._set_start(alloc)
+    ref.update()
+    start = {v.VarName: v.Start for v in ref.getVars() if v.Start != gp.GRB.UNDEFINED}
+    hints = {v.VarName: v.VarHintVal for v in model.getVars() if v.VarHintVal != gp.GRB.UNDEFINED}
+    assert hints == start
+    values = {key: v.VarHintVal for key, v in model._vars['x'].items()}
+    assert sorted(map(sorted, model._get_allocation(values))) == sorted(map(sorted, alloc))
+    for name in hints:
+        assert model.getVarByName(name).VarHintPri in ({2} if name in servers else {0, 1})
+
+
+@pytest.mark.parametrize('build', [model1.build, model2.build, model3.build])
+def test_lp_hints(build):
+    inst = instance()
+    model = build(inst, ub_servers=8, hints='lp')
+    model.update()
+    hinted = [v for v in model.getVars() if v.VarHintVal != gp.GRB.UNDEFINED]
+    assert len(hinted) > 0
+    for v in hinted:
+        assert v.VarHintVal in (0.0, 1.0) or v.VType != gp.GRB.BINARY
+        assert 1 <= v.VarHintPri <= 10
@@ -0,0 +1,108 @@
+import pytest
+
+gp = pytest.importorskip('gurobipy')
+
+from tbpp_cf2 import InstanceTBPPFU, ir, model1, model2
+from tbpp_cf2.util import compute_conflict_cliques, pairwise
+
+
+@pytest.fixture(autouse=True, scope='module')
+def quiet():
+    gp.setParam('OutputFlag', 0)
+
+
+def instance() -> InstanceTBPPFU:
+    return InstanceTBPPFU.random(14, 30, max_s=6, min_c=4, max_c=20, seed=3).sorted()
+
+
+def build_direct(inst: InstanceTBPPFU, lb_servers: int, ub_servers: int) -> 'gp.Model':
+    # model2 with conflicts, written against gurobipy itself
+    idx_i = range(inst.n)
+    idx_k = range(ub_servers)
+    ts_k = {k: set(inst.s[k:]) for k in idx_k}
+    te_k = {k: set(inst.e[k:]) for k in idx_k}
+    t_k = {k: sorted(ts_k[k] | te_k[k]) for k in idx_k}
+    tsnd_k = {
+        k: {t0 for t0, t1 in pairwise(t_k[k]) if t0 in ts_k[k] and t1 in te_k[k]}
+        for k in idx_k
+    }
+
+    m = gp.Model()
+    x = m.addVars([(i, k) for i in idx_i for k in idx_k if k <= i], vtype=gp.GRB.BINARY, name='x')
+    w = m.addVars([(l, k) for k in idx_k for l in ts_k[k]], obj=inst.gamma, vtype=gp.GRB.BINARY, name='w')
+    z = m.addVars(idx_k, obj=1, vtype=gp.GRB.BINARY, name='z')
+    m.addConstrs((x.sum(i, '*') == 1 for i in idx_i), name='assign')
+    m.addConstrs((
+        gp.quicksum(inst.c[j] * x[j, k] for j in idx_i[:i + 1] if j >= k and inst.s[i] < inst.e[j])
+        <= inst.cap * z[k]
+        for k in idx_k for i in idx_i if k <= i and inst.s[i] in tsnd_k[k]
+    ), name='cap')
+    m.addConstrs((x[i, k] <= z[k] for k in idx_k for i in idx_i if k <= i), name='use')
+    m.addConstrs((
+        x[i, k] <= w[inst.s[i], k] + gp.quicksum(x[j, k] for j in idx_i[k:i] if inst.e[j] >= inst.s[i])
+        for k in idx_k for i in idx_i if k <= i
+    ), name='fireup')
+    m.addConstr(sum(z[k] for k in idx_k[:lb_servers]) == lb_servers, name='lb_server')
+    m.addConstrs((z[k] >= z[k + 1] for k in idx_k[lb_servers:-1]), name='break_symmetry')
+    m.addConstrs((z[k] <= w.sum('*', k) for k in idx_k), name='server_fireup')
+    for k, cs_k in enumerate(compute_conflict_cliques(inst, ub_servers)):
+        for i, cs in cs_k.items():
+            for l, c in enumerate(cs):
+                m.addConstr(gp.quicksum(x[j, k] for j in c) <= z[k], name=f'conflict[{k},{i},{l}]')
+    m.update()
+    return m
+
+
+def rows(m: 'gp.Model') -> dict:
+    res = {}
+    for con in m.getConstrs():
+        row = m.getRow(con)
+        coef = {}
+        for pos in range(row.size()):
+            name = row.getVar(pos).VarName
+            coef[name] = coef.get(name, 0.0) + row.getCoeff(pos)
+        res[con.ConstrName] = ({v: a for v, a in coef.items() if a != 0}, con.Sense, con.RHS)
+    return res
+
+
+def test_to_gurobi_matches_direct_build():
+    inst = instance()
+    model = model2.build(inst, lb_servers=2, ub_servers=8)
+    model.update()
+    direct = build_direct(inst, 2, 8)
+    assert rows(model) == rows(direct)
+    assert {v.VarName: (v.VType, v.LB, v.UB, v.Obj) for v in model.getVars()} == \
+        {v.VarName: (v.VType, v.LB, v.UB, v.Obj) for v in direct.getVars()}
+
+
+def test_add_constrs_keys():
+    m = ir.Model()
+    x = m.addVars(3, 2, name='x')
+    res = m.addConstrs((((i, k), x[i, k] <= 1) for i in range(3) for k in range(2)), name='ub')
+    assert list(res) == [(i, k) for i in range(3) for k in range(2)]
+    m.addConstrs({i: x.sum(i, '*') >= 1 for i in range(3)}, name='cover')
+    assert m.constr_names[:2] == ['ub[0,0]', 'ub[0,1]']
+    assert m.constr_names[-3:] == ['cover[0]', 'cover[1]', 'cover[2]']
+
+
+@pytest.mark.parametrize('build', [model1.build, model2.build])
+def test_highs_and_mps(tmp_path, build):
+    pytest.importorskip('scipy', minversion='1.9')
+    inst = instance()
+    model = build(inst, lb_servers=2, ub_servers=8, backend='highs')
+    model.setParam('OutputFlag', 0)
+    model.optimize()
+    assert model.Status == ir.Status.OPTIMAL
+
+    path = str(tmp_path / 'model.mps')
+    model.write(path)
+    read = gp.read(path)
+    assert read.NumVars == model.NumVars
+    assert read.NumConstrs == model.NumConstrs
+    read.optimize()
+    assert read.ObjVal == pytest.approx(model.ObjVal)
+
+    gurobi = ir.to_gurobi(model)
+    gurobi.optimize()
+    assert gurobi.ObjVal == pytest.approx(model.ObjVal)
+    assert inst.compute_value(model._get_allocation()) == pytest.approx(model.ObjVal)
@@ -0,0 +1,30 @@
+from tbpp_cf2 import InstanceTBPPFU, memo
+from tbpp_cf2.memo import ResultCache
+
+
+def test_solve_key_depends_on_its_model(tmp_path, monkeypatch):
+    hashed = []
+
+    def code_hash(*modules):
+        hashed.append({module.__name__ for module in modules})
+        return ','.join(sorted(hashed[-1]))
+
+    monkeypatch.setattr(memo, 'code_hash', code_hash)
+    cache = ResultCache(str(tmp_path))
+    inst = InstanceTBPPFU.random(10, 20, seed=0)
+    calls = []
+
+    def solve():
+        calls.append(None)
+        return dict(val=1.0)
+
+    for _ in range(2):
+        assert cache.solve('model1', inst, dict(time_limit=1), solve) == dict(val=1.0)
+    assert len(calls) == 1
+    names = hashed[0]
+    assert {'tbpp_cf2.model1', 'tbpp_cf2.ir', 'tbpp_cf2.util', 'tbpp_cf2.solve'} <= names
+    assert not names & {'tbpp_cf2', 'tbpp_cf2.model2', 'tbpp_cf2.model3', 'tbpp_cf2.sweep', 'tbpp_cf2.selection'}
+
+    cache.solve('model2', inst, dict(time_limit=1), solve)
+    assert len(calls) == 2
+    assert 'tbpp_cf2.model1' not in hashed[-1]
@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+
+def test_star_import():
+    ns = {}
+    exec('from tbpp_cf2 import *', ns)
+    for name in ['InstanceTBPP', 'InstanceTBPPFU', 'instance', 'heuristic', 'model1', 'model2', 'model3', 'data', 'lifting', 'lift']:
+        assert name in ns
+
+
+def test_lazy_gurobipy():
+    code = 'import sys, tbpp_cf2; tbpp_cf2.heuristic; tbpp_cf2.data; print("gurobipy" in sys.modules)'
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == 'False'
@@ -0,0 +1,103 @@
+import json
+import math
+import pytest
+
+gp = pytest.importorskip('gurobipy')
+
+from tbpp_cf2 import InstanceTBPPFU, heuristic, model2
+from tbpp_cf2.bench import runner
+from tbpp_cf2.bench.runner import Config, append_record, checkpoint_key, model_mods, read_done, run_settings, solve_model
+from tbpp_cf2.bounds import compute_bounds
+from tbpp_cf2.solve import Checkpoint, solve_lp
+
+
+@pytest.fixture(autouse=True, scope='module')
+def quiet():
+    gp.setParam('OutputFlag', 0)
+
+
+def prepared(seed: int = 0):
+    inst = InstanceTBPPFU.random(16, 30, max_s=6, min_c=4, max_c=20, seed=seed).sorted()
+    alloc = heuristic.best_look_ahead(inst, {1, 2, 3})
+    ub_servers = int(math.ceil(round(inst.compute_value(alloc)) / (1.0 + inst.gamma) - 1e-8))
+    bounds = compute_bounds(inst)
+    return inst, alloc, bounds.servers, ub_servers, bounds.value
+
+
+def test_resume_exhausted_checkpoint(tmp_path):
+    cfg = Config(root=str(tmp_path), log=str(tmp_path / 'log.jsonl'), time_limit=5.0)
+    inst, alloc, lb_servers, ub_servers, lb_value = prepared()
+    mods = model_mods(cfg, 'model2')
+    path = str(tmp_path / 'ckpt.json')
+    # an interrupted run that already used the whole time limit
+    Checkpoint(
+        key=checkpoint_key(cfg, 'model2', mods, inst, lb_servers, ub_servers),
+        alloc=[sorted(pat) for pat in alloc],
+        value=inst.compute_value(alloc),
+        runtime=cfg.time_limit,
+    ).save(path)
+
+    res = solve_model(cfg, 'model2', mods, inst, alloc, lb_servers, ub_servers, lb_value, path)
+    assert res['dt_solve'] >= cfg.time_limit
+    assert res['val'] == pytest.approx(inst.compute_value(alloc))
+    # the LP relaxation does not inherit the remaining time of the MIP
+    assert res['val_relax'] is not None
+    assert res['val_relax'] <= res['val'] + 1e-6
+
+
+def test_lp_time_limit():
+    inst, _, lb_servers, ub_servers, _ = prepared()
+    model = model2.build(inst, lb_servers=lb_servers, ub_servers=ub_servers)
+    model.setParam('TimeLimit', 0.0)
+    lp = solve_lp(model, in_place=True)
+    assert lp.status == gp.GRB.Status.OPTIMAL
+    assert lp.value is not None
+
+    lp = solve_lp(model, time_limit=0.0, in_place=True)
+    assert lp.status == gp.GRB.Status.TIME_LIMIT
+    assert lp.value is None
+    # the parameters and the integrality of the model are restored
+    assert model.Params.TimeLimit == 0.0
+    assert model.IsMIP
+
+
+def test_failed_pairs_are_logged(tmp_path, monkeypatch):
+    group = tmp_path / 'n12 t30 A'
+    group.mkdir()
+    inst = InstanceTBPPFU.random(12, 30, max_s=6, min_c=4, max_c=20, seed=0)
+    with open(group / 'good.txt', 'w') as f:
+        f.write(f'{inst.n} {inst.cap} 0 0\n')
+        for i in range(inst.n):
+            f.write(f'{i} {inst.s[i]} {inst.e[i]} {inst.c[i]}\n')
+    (group / 'bad.txt').write_text('not an instance\n')
+    cfg = Config(root=str(tmp_path), log=str(tmp_path / 'log.jsonl'), time_limit=5.0)
+
+    def solve_model_failing(cfg, model_name, *args, **kwargs):
+        if model_name == 'model2':
+            raise RuntimeError('model2 failed')
+        return solve_model(cfg, model_name, *args, **kwargs)
+
+    monkeypatch.setattr(runner, 'solve_model', solve_model_failing)
+    runner._run_task((cfg, group.name, 'good.txt', ['model1', 'model2', 'model3']))
+    runner._run_task((cfg, group.name, 'bad.txt', ['model1']))
+
+    with open(cfg.log) as f:
+        recs = {(rec['inst_name'], rec['model_name']): rec for rec in map(json.loads, f)}
+    assert set(recs) == {('good.txt', 'model1'), ('good.txt', 'model2'), ('good.txt', 'model3'), ('bad.txt', 'model1')}
+    assert recs['good.txt', 'model1']['val'] == recs['good.txt', 'model3']['val']
+    assert 'RuntimeError: model2 failed' in recs['good.txt', 'model2']['error']
+    assert 'error' in recs['bad.txt', 'model1']
+    # failed pairs are retried
+    assert read_done(cfg.log, run_settings(cfg)) == {('good.txt', 'model1'), ('good.txt', 'model3')}
+
+
+def test_done_pairs_by_settings(tmp_path):
+    log = str(tmp_path / 'log.jsonl')
+    plain = Config(root=str(tmp_path), log=log)
+    hinted = Config(root=str(tmp_path), log=log, priority=5, hints='heuristic')
+    # a record of an older log without the settings
+    append_record(log, dict(inst_name='a.txt', model_name='model1'))
+    append_record(log, dict(inst_name='b.txt', model_name='model1', **run_settings(hinted)))
+    assert read_done(log) == {('a.txt', 'model1'), ('b.txt', 'model1')}
+    assert read_done(log, run_settings(plain)) == {('a.txt', 'model1')}
+    assert read_done(log, run_settings(hinted)) == {('b.txt', 'model1')}
@@ -0,0 +1,59 @@
+import random
+import pytest
+
+gp = pytest.importorskip('gurobipy')
+
+from brute_force import feasible_allocations, fireups
+from tbpp_cf2 import InstanceTBPPFU, model1, model2, model3, sweep
+
+
+@pytest.fixture(autouse=True, scope='module')
+def quiet():
+    gp.setParam('OutputFlag', 0)
+
+
+def tiny_instance(seed: int) -> InstanceTBPPFU:
+    rng = random.Random(seed)
+    return InstanceTBPPFU.random(
+        rng.randint(2, 7), 10, max_s=rng.randint(2, 6), max_dt=rng.randint(1, 5),
+        min_c=2, max_c=8, seed=seed,
+    ).sorted()
+
+
+def brute_force_front(inst: InstanceTBPPFU) -> list[tuple[int, int]]:
+    pairs = {
+        (len(alloc), sum(fireups(inst, pat) for pat in alloc))
+        for alloc in feasible_allocations(inst)
+    }
+    front = []
+    for servers, count in sorted(pairs):
+        if len(front) == 0 or count < front[-1][1]:
+            front.append((servers, count))
+    return front
+
+
+@pytest.mark.parametrize('build', [model1.build, model2.build, model3.build])
+@pytest.mark.parametrize('seed', range(10))
+def test_pareto_front(build, seed: int):
+    inst = tiny_instance(seed)
+    model = build(inst, ub_servers=inst.n)
+    model.setParam('MIPGap', 0.5)
+    model.update()
+    objective = str(model.getObjective())
+    points = sweep.pareto_front(model)
+    assert [(p.servers, p.fireups) for p in points] == brute_force_front(inst)
+    assert all(p.solved for p in points)
+    # the model is unchanged
+    model.update()
+    assert model.Params.MIPGap == 0.5
+    assert str(model.getObjective()) == objective
+    assert all(con.ConstrName != 'eps_fireups' for con in model.getConstrs())
+
+
+def test_pareto_front_stops_unsolved():
+    inst = InstanceTBPPFU.random(40, 30, max_s=10, min_c=2, max_c=8, seed=0).sorted()
+    model = model1.build(inst, ub_servers=inst.n)
+    model.setParam('NodeLimit', 0)
+    points = sweep.pareto_front(model)
+    assert len(points) <= 1
+    assert all(not p.solved for p in points)